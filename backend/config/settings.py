@@ -68,6 +68,28 @@ DATABASES = {
     }
 }
 
+# Shared cache: the Vision circuit breaker, OCR/translation counters and the
+# glossary version must be seen by every gunicorn worker and run_ocr_worker.
+# "db" (default) uses the django_cache table, "redis" uses CACHE_REDIS_URL;
+# "locmem" is per process and only suitable for a single-process dev server.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "db")
+if CACHE_BACKEND == "redis":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("CACHE_REDIS_URL", "redis://127.0.0.1:6379/1"),
+        }
+    }
+elif CACHE_BACKEND == "locmem":
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "django_cache",
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -118,3 +140,95 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
 FREE_USAGE_LIMIT = int(os.getenv("FREE_USAGE_LIMIT", "5"))
+
+# OCR: pages OCR'd in parallel per request, and the hard cap per worker process.
+OCR_PAGE_CONCURRENCY = int(os.getenv("OCR_PAGE_CONCURRENCY", "4"))
+OCR_MAX_CONCURRENCY = int(os.getenv("OCR_MAX_CONCURRENCY", "8"))
+# Vision batching: pages per images:annotate call and base64 bytes per call (API caps: 16 images, ~10 MB).
+OCR_VISION_BATCH_SIZE = int(os.getenv("OCR_VISION_BATCH_SIZE", "8"))
+OCR_VISION_BATCH_BYTES = int(os.getenv("OCR_VISION_BATCH_BYTES", "8000000"))
+# Rasterization: zoom bounds for adaptive rendering, pixel budget per page, glyph height
+# (px) small text should reach, and the per-image base64 cap for Vision payloads.
+OCR_BASE_ZOOM = float(os.getenv("OCR_BASE_ZOOM", "2"))
+OCR_MIN_ZOOM = float(os.getenv("OCR_MIN_ZOOM", "1"))
+OCR_MAX_ZOOM = float(os.getenv("OCR_MAX_ZOOM", "3"))
+OCR_MAX_PIXELS = int(os.getenv("OCR_MAX_PIXELS", "6000000"))
+OCR_MIN_TEXT_PX = float(os.getenv("OCR_MIN_TEXT_PX", "20"))
+OCR_VISION_MAX_IMAGE_BYTES = int(os.getenv("OCR_VISION_MAX_IMAGE_BYTES", "7500000"))
+# Uploaded photos are downsampled so their long side is at most this many pixels.
+OCR_PHOTO_MAX_SIDE = int(os.getenv("OCR_PHOTO_MAX_SIDE", "3000"))
+# PDF pages whose text layer has at least this many characters skip OCR in "hybrid" mode.
+OCR_TEXT_LAYER_MIN_CHARS = int(os.getenv("OCR_TEXT_LAYER_MIN_CHARS", "50"))
+OCR_VISION_TIMEOUT = int(os.getenv("OCR_VISION_TIMEOUT", "60"))
+# Vision circuit breaker: opens when at least FAILURE_RATE of the last WINDOW calls
+# (and MIN_CALLS or more) failed; pages then go to the local engine until a probe
+# after COOLDOWN seconds succeeds. State is shared through the Django cache.
+OCR_VISION_BREAKER_ENABLED = os.getenv("OCR_VISION_BREAKER_ENABLED", "1") == "1"
+OCR_VISION_BREAKER_WINDOW = int(os.getenv("OCR_VISION_BREAKER_WINDOW", "20"))
+OCR_VISION_BREAKER_MIN_CALLS = int(os.getenv("OCR_VISION_BREAKER_MIN_CALLS", "4"))
+OCR_VISION_BREAKER_FAILURE_RATE = float(os.getenv("OCR_VISION_BREAKER_FAILURE_RATE", "0.5"))
+OCR_VISION_BREAKER_COOLDOWN = int(os.getenv("OCR_VISION_BREAKER_COOLDOWN", "60"))
+# "local_first": read pages with the local engine and send only pages below
+# OCR_LOCAL_MIN_CONFIDENCE (mean word confidence, 0-100) or with fewer than
+# OCR_LOCAL_MIN_WORDS words to Vision. "vision_first": Vision for every page.
+OCR_STRATEGY = os.getenv("OCR_STRATEGY", "local_first")
+OCR_LOCAL_MIN_CONFIDENCE = float(os.getenv("OCR_LOCAL_MIN_CONFIDENCE", "85"))
+OCR_LOCAL_MIN_WORDS = int(os.getenv("OCR_LOCAL_MIN_WORDS", "5"))
+# Pre-pass on rendered pages, off by default: a page with fewer than OCR_BLANK_MIN_INK_TILES
+# inked tiles (about 1/256 of the page width, measured at render resolution) is reported
+# as blank, and a page whose pixels are identical to an earlier page's is reported as a
+# duplicate and given that page's text; neither is OCR'd.
+OCR_SKIP_BLANK_PAGES = os.getenv("OCR_SKIP_BLANK_PAGES", "0") == "1"
+OCR_BLANK_MIN_INK_TILES = int(os.getenv("OCR_BLANK_MIN_INK_TILES", "8"))
+OCR_DEDUPE_PAGES = os.getenv("OCR_DEDUPE_PAGES", "0") == "1"
+# Local OCR engine used when Vision is missing or fails: "tesseract" (in-process) or
+# "tesseract_pool" (warm process pool, one core and OMP_THREAD_LIMIT threads per worker;
+# requires the tesserocr package, which is not in requirements.txt).
+OCR_LOCAL_ENGINE = os.getenv("OCR_LOCAL_ENGINE", "tesseract")
+OCR_TESSERACT_POOL_SIZE = int(os.getenv("OCR_TESSERACT_POOL_SIZE", "0"))  # 0 = CPU count - 1
+OCR_TESSERACT_LANGUAGES = os.getenv("OCR_TESSERACT_LANGUAGES", "tur,jpn,eng")
+OCR_TESSERACT_OMP_THREADS = int(os.getenv("OCR_TESSERACT_OMP_THREADS", "1"))
+# Largest single range accepted in the "pages" option of documents/<id>/ocr/.
+OCR_MAX_SELECTED_PAGES = int(os.getenv("OCR_MAX_SELECTED_PAGES", "2000"))
+# Spreadsheet text extraction caps (rows kept / UTF-8 bytes of extracted text).
+SPREADSHEET_MAX_ROWS = int(os.getenv("SPREADSHEET_MAX_ROWS", "100000"))
+SPREADSHEET_MAX_BYTES = int(os.getenv("SPREADSHEET_MAX_BYTES", "5000000"))
+# Translation memory: in-process LRU in front of the TranslationMemoryEntry table.
+# Texts longer than TRANSLATION_MEMORY_MAX_CHARS (whole documents) are not remembered.
+TRANSLATION_MEMORY_ENABLED = os.getenv("TRANSLATION_MEMORY_ENABLED", "1") == "1"
+TRANSLATION_MEMORY_LRU_SIZE = int(os.getenv("TRANSLATION_MEMORY_LRU_SIZE", "2048"))
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "100000"))
+TRANSLATION_MEMORY_TTL_DAYS = int(os.getenv("TRANSLATION_MEMORY_TTL_DAYS", "180"))
+TRANSLATION_MEMORY_MAX_CHARS = int(os.getenv("TRANSLATION_MEMORY_MAX_CHARS", "5000"))
+# Long texts are translated in chunks of about TRANSLATION_CHUNK_TOKENS tokens,
+# TRANSLATION_CONCURRENCY at a time; a chunk whose connection failed is retried
+# TRANSLATION_CHUNK_RETRIES times (HTTP errors and timeouts are not).
+TRANSLATION_CHUNK_TOKENS = int(os.getenv("TRANSLATION_CHUNK_TOKENS", "1200"))
+TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", "4"))
+TRANSLATION_CHUNK_RETRIES = int(os.getenv("TRANSLATION_CHUNK_RETRIES", "2"))
+# Outgoing provider HTTP: pooled keep-alive sessions per host, retries with
+# exponential backoff + jitter (Retry-After honored, capped at HTTP_BACKOFF_MAX).
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "20"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+CHAT_TIMEOUT = float(os.getenv("CHAT_TIMEOUT", "30"))
+# Glossary terms are compiled per language pair into an in-process automaton;
+# processes pick up glossary edits within GLOSSARY_REFRESH_SECONDS.
+GLOSSARY_ENABLED = os.getenv("GLOSSARY_ENABLED", "1") == "1"
+GLOSSARY_REFRESH_SECONDS = float(os.getenv("GLOSSARY_REFRESH_SECONDS", "5"))
+# Per-call translation records (route, model, latency) are kept this many days.
+TRANSLATION_CALL_LOG_DAYS = int(os.getenv("TRANSLATION_CALL_LOG_DAYS", "30"))
+# OCR job queue: run_ocr enqueues and `manage.py run_ocr_worker` processes jobs.
+# With OCR_ASYNC=0 the request runs the job inline (no worker needed).
+OCR_ASYNC = os.getenv("OCR_ASYNC", "1") == "1"
+OCR_WORKER_CONCURRENCY = int(os.getenv("OCR_WORKER_CONCURRENCY", "2"))
+OCR_JOB_VISIBILITY_TIMEOUT = int(os.getenv("OCR_JOB_VISIBILITY_TIMEOUT", "300"))
+OCR_JOB_MAX_ATTEMPTS = int(os.getenv("OCR_JOB_MAX_ATTEMPTS", "3"))
+OCR_JOB_RETRY_DELAY = int(os.getenv("OCR_JOB_RETRY_DELAY", "30"))
+# OCR result cache keyed by page image hash.
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "1") == "1"
+OCR_CACHE_MAX_ENTRIES = int(os.getenv("OCR_CACHE_MAX_ENTRIES", "20000"))
+OCR_CACHE_MAX_AGE_DAYS = int(os.getenv("OCR_CACHE_MAX_AGE_DAYS", "90"))
@@ -12,6 +12,12 @@ from .models import (
     AIChatLog,
     TemplateField,
     SiteSettings,
+    OCRCacheEntry,
+    OCRJob,
+    DocumentPage,
+    TranslationMemoryEntry,
+    GlossaryTerm,
+    TranslationCall,
 )
 
 
@@ -97,3 +103,48 @@ class AIChatLogAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at",)
     date_hierarchy = "created_at"
     ordering = ["-created_at"]
+
+
+@admin.register(OCRCacheEntry)
+class OCRCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ("key", "engine", "language_hint", "size_bytes", "hit_count", "last_used_at")
+    list_filter = ("engine", "language_hint")
+    search_fields = ("key",)
+    readonly_fields = ("created_at",)
+
+
+@admin.register(TranslationMemoryEntry)
+class TranslationMemoryEntryAdmin(admin.ModelAdmin):
+    list_display = ("key", "source_language", "target_language", "model", "hit_count", "last_used_at")
+    list_filter = ("source_language", "target_language", "model")
+    search_fields = ("source_text", "translated_text")
+    readonly_fields = ("created_at",)
+
+
+@admin.register(GlossaryTerm)
+class GlossaryTermAdmin(admin.ModelAdmin):
+    list_display = ("source_term", "target_term", "source_language", "target_language", "is_active", "updated_at")
+    list_filter = ("source_language", "target_language", "is_active")
+    search_fields = ("source_term", "target_term", "note")
+
+
+@admin.register(TranslationCall)
+class TranslationCallAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "route", "model", "input_chars", "latency_ms", "ttfb_ms", "streamed", "ok")
+    list_filter = ("route", "model", "streamed", "ok")
+    readonly_fields = ("created_at",)
+
+
+@admin.register(DocumentPage)
+class DocumentPageAdmin(admin.ModelAdmin):
+    list_display = ("id", "document", "page_number", "engine", "confidence", "cached", "created_at")
+    list_filter = ("engine",)
+    search_fields = ("document__id", "text")
+
+
+@admin.register(OCRJob)
+class OCRJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "document", "user", "status", "attempts", "locked_by", "created_at", "finished_at")
+    list_filter = ("status", "created_at")
+    search_fields = ("document__id", "user__username", "error")
+    readonly_fields = ("created_at", "updated_at", "started_at", "finished_at")
@@ -0,0 +1,59 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from core.services.glossary import TermAutomaton
+
+BASE_TERMS = [
+    ("解体", "yıkım"), ("石綿", "asbest"), ("足場", "iskele"), ("養生", "koruma örtüsü"), ("鉄筋", "inşaat demiri"),
+    ("型枠", "kalıp"), ("基礎", "temel"), ("躯体", "taşıyıcı sistem"), ("外壁", "dış cephe"), ("内装", "iç mekan"),
+    ("産業廃棄物", "endüstriyel atık"), ("アスベスト", "asbest"), ("コンクリート", "beton"), ("鉄骨", "çelik karkas"),
+]
+KANJI = "解体石綿足場養生鉄筋型枠基礎躯体外壁内装工事撤去搬出運搬処分施工管理安全防音防塵散水重機"
+LATIN = "abcdefghijklmnoprstuvyzçğıöşü"
+
+
+def _synthetic_terms(count, seed=7):
+    rng = random.Random(seed)
+    terms = dict(BASE_TERMS)
+    while len(terms) < count:
+        if rng.random() < 0.6:
+            source = "".join(rng.choice(KANJI) for _ in range(rng.randint(2, 6)))
+        else:
+            source = " ".join(
+                "".join(rng.choice(LATIN) for _ in range(rng.randint(4, 10))) for _ in range(rng.randint(1, 3))
+            )
+        terms.setdefault(source, f"term-{len(terms)}")
+    return list(terms.items())
+
+
+def _per_call_us(func, arg, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(arg)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+class Command(BaseCommand):
+    help = "Measure glossary automaton build time and lookup latency for a large synthetic glossary."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--terms", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        terms = _synthetic_terms(options["terms"])
+        started = time.perf_counter()
+        automaton = TermAutomaton(terms)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        field_value = "既存建物の解体工事および石綿除去"
+        sentence = "解体工事に先立ち、石綿含有建材の事前調査を行い、足場と養生シートを設置した上で産業廃棄物を適正に処分する。"
+        paragraph = (sentence * 12)[:600]
+        repeat = options["repeat"]
+
+        self.stdout.write(f"{len(automaton)} terms compiled in {build_ms:.1f} ms")
+        self.stdout.write(f"  exact match (field value):        {_per_call_us(automaton.exact, '石綿', repeat):8.1f} us")
+        self.stdout.write(f"  find ({len(field_value)} chars field value):   {_per_call_us(automaton.find, field_value, repeat):8.1f} us")
+        self.stdout.write(f"  find ({len(sentence)} chars sentence):      {_per_call_us(automaton.find, sentence, repeat):8.1f} us")
+        self.stdout.write(f"  find ({len(paragraph)} chars paragraph):    {_per_call_us(automaton.find, paragraph, repeat // 10 or 1):8.1f} us")
+        self.stdout.write(f"  terms found in sentence: {automaton.find(sentence)[:6]}")
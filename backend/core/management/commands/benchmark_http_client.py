@@ -0,0 +1,100 @@
+import json
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import requests
+from django.core.management.base import BaseCommand
+from core.services import http_client
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so the server keeps connections alive like the real providers.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    failures = {"left": 0}
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.failures["left"] > 0:
+            self.failures["left"] -= 1
+            status, body, headers = 429, b'{"error": "rate limited"}', {"Retry-After": "0"}
+        else:
+            status, body, headers = 200, json.dumps({"output_text": "ok"}).encode("utf-8"), {}
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _self_signed_context(directory):
+    if not shutil.which("openssl"):
+        return None
+    cert, key = Path(directory) / "cert.pem", Path(directory) / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost",
+         "-addext", "subjectAltName=DNS:localhost",
+         "-keyout", str(key), "-out", str(cert)],
+        check=True,
+        capture_output=True,
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context, str(cert)
+
+
+class Command(BaseCommand):
+    help = "Compare bare requests.post with the pooled provider client against a local stub server."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--plain", action="store_true", help="Use plain HTTP instead of a self-signed TLS stub")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+            tls = None if options["plain"] else _self_signed_context(tmp)
+            verify = True
+            if tls:
+                context, verify = tls
+                server.socket = context.wrap_socket(server.socket, server_side=True)
+            scheme = "https" if tls else "http"
+            url = f"{scheme}://localhost:{server.server_address[1]}/v1/responses"
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            payload = {"model": "stub", "input": "x" * 512}
+            count = options["requests"]
+            try:
+                started = time.perf_counter()
+                for _ in range(count):
+                    requests.post(url, json=payload, timeout=10, verify=verify).raise_for_status()
+                bare = time.perf_counter() - started
+
+                http_client.post("benchmark", url, json=payload, verify=verify)  # warm the pool
+                started = time.perf_counter()
+                for _ in range(count):
+                    http_client.post("benchmark", url, json=payload, verify=verify).raise_for_status()
+                pooled = time.perf_counter() - started
+
+                _StubHandler.failures["left"] = 2
+                started = time.perf_counter()
+                status = http_client.post("benchmark", url, json=payload, verify=verify).status_code
+                retried = time.perf_counter() - started
+            finally:
+                server.shutdown()
+                server.server_close()
+
+        self.stdout.write(f"{count} sequential POSTs over {scheme.upper()} to a local stub:")
+        self.stdout.write(f"  requests.post (new connection each): {1000 * bare / count:.2f} ms/request")
+        self.stdout.write(f"  http_client.post (pooled keep-alive): {1000 * pooled / count:.2f} ms/request")
+        self.stdout.write(f"  saved per request: {1000 * (bare - pooled) / count:.2f} ms")
+        self.stdout.write(f"  two 429s with Retry-After: 0 -> final status {status} after {1000 * retried:.1f} ms")
@@ -0,0 +1,74 @@
+import difflib
+import time
+from pathlib import Path
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.services.ocr_service import DEFAULT_RENDER_OPTIONS, iter_pdf_pages, run_free_ocr_from_image
+from core.services.utils import get_google_vision_key, request_google_vision_text
+
+VARIANTS = {
+    "png-fixed": DEFAULT_RENDER_OPTIONS,
+    "png-adaptive": dict(DEFAULT_RENDER_OPTIONS, adaptive_zoom=True),
+    "png-gray-adaptive": dict(DEFAULT_RENDER_OPTIONS, adaptive_zoom=True, grayscale=True),
+    "jpeg-gray-adaptive": dict(DEFAULT_RENDER_OPTIONS, adaptive_zoom=True, grayscale=True, image_format="jpeg"),
+}
+
+
+def _text_layers(path):
+    import fitz
+
+    with fitz.open(path) as pdf_document:
+        return [page.get_text("text").strip() for page in pdf_document]
+
+
+class Command(BaseCommand):
+    help = "Compare Vision payload size, upload time and OCR accuracy across page rendering variants."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="PDF files (defaults to the PDFs in sample_templates)")
+        parser.add_argument("--engine", choices=["auto", "vision", "tesseract", "none"], default="auto")
+        parser.add_argument("--mbps", type=float, default=10.0, help="Uplink used to estimate upload time")
+        parser.add_argument("--upload-url", default="", help="POST each payload here to measure real upload time")
+        parser.add_argument("--language-hint", default="ja")
+
+    def _ocr(self, engine, page, language_hint):
+        if engine == "vision":
+            return request_google_vision_text(page.payload, language_hint)
+        if engine == "tesseract":
+            return run_free_ocr_from_image(page.pixels(), language_hint)
+        return None
+
+    def handle(self, *args, **options):
+        paths = [Path(path) for path in options["paths"]]
+        if not paths:
+            paths = sorted((Path(settings.BASE_DIR) / "sample_templates").glob("*.pdf"))
+        engine = options["engine"]
+        if engine == "auto":
+            engine = "vision" if get_google_vision_key() else "tesseract"
+
+        for path in paths:
+            reference = _text_layers(path)
+            self.stdout.write(path.name)
+            for name, render_options in VARIANTS.items():
+                payload_bytes = 0
+                upload_seconds = 0.0
+                scores = []
+                for page in iter_pdf_pages(path, render_options=render_options):
+                    payload = page.payload
+                    payload_bytes += len(payload)
+                    if options["upload_url"]:
+                        started = time.perf_counter()
+                        requests.post(options["upload_url"], data=payload, timeout=60)
+                        upload_seconds += time.perf_counter() - started
+                    else:
+                        upload_seconds += len(payload) * 8 / (options["mbps"] * 1_000_000)
+                    text = self._ocr(engine, page, options["language_hint"])
+                    expected = reference[page.number - 1]
+                    if text is not None and expected:
+                        scores.append(difflib.SequenceMatcher(None, expected, text).ratio())
+                accuracy = f"{100 * sum(scores) / len(scores):.1f}%" if scores else "n/a"
+                self.stdout.write(
+                    f"  {name:<20} payload {payload_bytes / 1024:9.0f} KiB  "
+                    f"upload {upload_seconds:6.2f} s  accuracy ({engine}) {accuracy}"
+                )
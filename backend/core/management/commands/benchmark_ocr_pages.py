@@ -0,0 +1,47 @@
+import base64
+import io
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image
+from core.services.ocr_service import iter_pdf_pages
+
+
+def _png_round_trip(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    encoded = base64.b64encode(buffer.getvalue()).decode("utf-8")
+    decoded = Image.open(io.BytesIO(base64.b64decode(encoded)))
+    decoded.load()
+    return decoded
+
+
+class Command(BaseCommand):
+    help = "Measure the per-page cost of handing rendered PDF pages to the local OCR engine."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="PDF files (defaults to the PDFs in sample_templates)")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        paths = [Path(path) for path in options["paths"]]
+        if not paths:
+            paths = sorted((Path(settings.BASE_DIR) / "sample_templates").glob("*.pdf"))
+        for path in paths:
+            round_trip = []
+            direct = []
+            for _ in range(options["repeat"]):
+                for page in iter_pdf_pages(path):
+                    started = time.perf_counter()
+                    _png_round_trip(page.image)
+                    round_trip.append(time.perf_counter() - started)
+                    started = time.perf_counter()
+                    page.pixels().load()
+                    direct.append(time.perf_counter() - started)
+            old_ms = 1000 * sum(round_trip) / len(round_trip)
+            new_ms = 1000 * sum(direct) / len(direct)
+            self.stdout.write(
+                f"{path.name}: PNG/base64 round trip {old_ms:.1f} ms/page, "
+                f"direct pixels {new_ms:.2f} ms/page, saved {old_ms - new_ms:.1f} ms/page"
+            )
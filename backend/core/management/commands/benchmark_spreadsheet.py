@@ -0,0 +1,80 @@
+import multiprocessing
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from openpyxl import Workbook, load_workbook
+from core.services.spreadsheet_service import extract_spreadsheet_text
+
+
+def _full_mode_text(file_path):
+    # The previous extraction: every cell object in memory, rows joined from a list.
+    chunks = []
+    workbook = load_workbook(file_path, data_only=True)
+    for sheet in workbook.worksheets:
+        for row in sheet.iter_rows(values_only=True):
+            row_text = " ".join([str(cell) for cell in row if cell is not None])
+            if row_text.strip():
+                chunks.append(row_text)
+    return "\n".join(chunks)
+
+
+def _generate(path, rows, cols):
+    # write_only keeps generation itself from dominating the benchmark's memory.
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("マニフェスト")
+    sheet.append([f"列{col}" for col in range(cols)])
+    for row in range(rows):
+        sheet.append([f"M-{row:07d}", row, row * 1.5, "産業廃棄物", "東京都", "収集運搬", "2024-04-01", "kg"][:cols])
+    workbook.save(path)
+
+
+def _streaming_text(file_path):
+    # Caps are lifted so both extractors produce the same text.
+    return extract_spreadsheet_text(file_path, max_rows=10**9, max_bytes=10**12)[0]
+
+
+def _run(function, file_path):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    text = function(file_path)
+    elapsed = time.perf_counter() - started
+    grown_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    return elapsed, grown_kb * 1024, text
+
+
+def _measure(function, file_path):
+    # A fresh forked process per extractor, so peak RSS growth is its own.
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("fork")) as executor:
+        return executor.submit(_run, function, file_path).result()
+
+
+class Command(BaseCommand):
+    help = "Compare full-mode and streaming spreadsheet text extraction on a generated workbook."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", help="Existing .xlsx/.xls to measure instead of a generated one")
+        parser.add_argument("--rows", type=int, default=200000)
+        parser.add_argument("--cols", type=int, default=8)
+        parser.add_argument("--skip-full", action="store_true", help="Only measure the streaming extractor")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = options["path"]
+            if not path:
+                path = str(Path(tmp) / "benchmark.xlsx")
+                started = time.perf_counter()
+                _generate(path, options["rows"], options["cols"])
+                self.stdout.write(
+                    f"Generated {options['rows']} rows x {options['cols']} cols "
+                    f"({Path(path).stat().st_size / 1e6:.1f} MB) in {time.perf_counter() - started:.1f} s"
+                )
+            results = {"streaming": _measure(_streaming_text, path)}
+            if not options["skip_full"]:
+                results["full"] = _measure(_full_mode_text, path)
+            for name, (elapsed, peak, text) in results.items():
+                self.stdout.write(f"{name:>9}: {elapsed:.2f} s, peak RSS +{peak / 1e6:.1f} MB, {len(text) / 1e6:.1f} MB text")
+            if "full" in results:
+                self.stdout.write(f"Same output: {results['full'][2] == results['streaming'][2]}")
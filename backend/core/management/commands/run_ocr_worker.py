@@ -0,0 +1,54 @@
+import logging
+import signal
+import threading
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from core.services.ocr_jobs import claim_next_job, default_worker_id, process_job
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Run OCR jobs from the database queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=settings.OCR_WORKER_CONCURRENCY)
+        parser.add_argument("--poll-interval", type=float, default=2.0)
+        parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        worker_id = default_worker_id()
+
+        def work(slot):
+            name = f"{worker_id}:{slot}"
+            while not stop.is_set():
+                close_old_connections()
+                job = claim_next_job(name)
+                if job is None:
+                    if options["once"]:
+                        break
+                    stop.wait(options["poll_interval"])
+                    continue
+                self.stdout.write(f"[{name}] OCR job {job.id} (attempt {job.attempts})")
+                try:
+                    process_job(job)
+                except Exception:
+                    # The lease runs out and another pass picks the job up; keep this thread alive.
+                    logger.exception("OCR job %s crashed the worker", job.id)
+                self.stdout.write(f"[{name}] OCR job {job.id} -> {job.status}")
+            close_old_connections()
+
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        threads = [threading.Thread(target=work, args=(slot,), daemon=True) for slot in range(max(1, options["concurrency"]))]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            stop.set()
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-18 11:50
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_sitesettings_blackbox_repo_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OCRCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('engine', models.CharField(max_length=20)),
+                ('language_hint', models.CharField(blank=True, max_length=16)),
+                ('text', models.TextField(blank=True)),
+                ('size_bytes', models.PositiveIntegerField(default=0)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['last_used_at'], name='core_ocrcac_last_us_64b1b5_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-18 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_ocrcacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitesettings',
+            name='ocr_adaptive_zoom',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='ocr_grayscale',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='ocr_image_format',
+            field=models.CharField(blank=True, default='png', max_length=8),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='ocr_jpeg_quality',
+            field=models.PositiveSmallIntegerField(default=85),
+        ),
+    ]
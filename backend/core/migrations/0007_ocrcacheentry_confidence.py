@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_ocrjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ocrcacheentry',
+            name='confidence',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_ocrcacheentry_confidence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_number', models.PositiveIntegerField()),
+                ('text', models.TextField(blank=True)),
+                ('engine', models.CharField(max_length=20)),
+                ('confidence', models.FloatField(blank=True, null=True)),
+                ('elapsed_ms', models.PositiveIntegerField(default=0)),
+                ('cached', models.BooleanField(default=False)),
+                ('duplicate_of', models.PositiveIntegerField(blank=True, null=True)),
+                ('options_key', models.CharField(blank=True, max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='core.document')),
+            ],
+            options={
+                'ordering': ['document', 'page_number'],
+                'unique_together': {('document', 'page_number')},
+            },
+        ),
+    ]
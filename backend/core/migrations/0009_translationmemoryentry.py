@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_documentpage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationMemoryEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('source_language', models.CharField(blank=True, max_length=8)),
+                ('target_language', models.CharField(blank=True, max_length=8)),
+                ('model', models.CharField(blank=True, max_length=100)),
+                ('source_text', models.TextField()),
+                ('translated_text', models.TextField()),
+                ('size_bytes', models.PositiveIntegerField(default=0)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['last_used_at'], name='core_transl_last_us_db15ec_idx'), models.Index(fields=['created_at'], name='core_transl_created_af06e6_idx')],
+            },
+        ),
+    ]
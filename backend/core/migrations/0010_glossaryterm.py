@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_translationmemoryentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GlossaryTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_language', models.CharField(default='auto', max_length=8)),
+                ('target_language', models.CharField(default='ja', max_length=8)),
+                ('source_term', models.CharField(max_length=255)),
+                ('target_term', models.CharField(max_length=255)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['source_language', 'target_language', 'source_term'],
+                'unique_together': {('source_language', 'target_language', 'source_term')},
+            },
+        ),
+    ]
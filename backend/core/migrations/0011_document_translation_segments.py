@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_glossaryterm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='translation_segments',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_document_translation_segments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitesettings',
+            name='translation_fast_max_lines',
+            field=models.PositiveSmallIntegerField(default=3),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='translation_fast_max_tokens',
+            field=models.PositiveIntegerField(default=150),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='translation_fast_model',
+            field=models.CharField(blank=True, default='gpt-4o-mini', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='translation_fast_timeout',
+            field=models.PositiveSmallIntegerField(default=20),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='translation_quality_model',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='translation_quality_timeout',
+            field=models.PositiveSmallIntegerField(default=90),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='translation_routing_enabled',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.CreateModel(
+            name='TranslationCall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('route', models.CharField(max_length=20)),
+                ('reason', models.CharField(blank=True, max_length=40)),
+                ('model', models.CharField(max_length=100)),
+                ('input_chars', models.PositiveIntegerField(default=0)),
+                ('input_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('output_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('latency_ms', models.PositiveIntegerField(default=0)),
+                ('ttfb_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('streamed', models.BooleanField(default=False)),
+                ('ok', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='core_transl_created_2a10bd_idx')],
+            },
+        ),
+    ]
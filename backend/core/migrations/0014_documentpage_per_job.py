@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:49
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_create_cache_table'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='documentpage',
+            unique_together={('document', 'page_number', 'options_key')},
+        ),
+    ]
@@ -102,6 +102,8 @@ class Document(models.Model):
     target_language = models.CharField(max_length=8, default="ja")
     extracted_text = models.TextField(blank=True)
     translated_text = models.TextField(blank=True)
+    # Paragraf bazlı çeviri durumu: yeniden çeviride sadece değişen paragraflar gönderilir
+    translation_segments = models.JSONField(default=dict, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="uploaded")
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -240,6 +242,19 @@ class SiteSettings(models.Model):
     deepseek_api_key = models.CharField(max_length=200, blank=True)
     blackbox_api_key = models.CharField(max_length=200, blank=True)
     blackbox_repo_url = models.CharField(max_length=300, blank=True)
+    # OCR Rendering (Vision'a gönderilen sayfa görüntüleri)
+    ocr_adaptive_zoom = models.BooleanField(default=True)
+    ocr_image_format = models.CharField(max_length=8, default="png", blank=True)  # png, jpeg
+    ocr_grayscale = models.BooleanField(default=False)
+    ocr_jpeg_quality = models.PositiveSmallIntegerField(default=85)
+    # Çeviri model yönlendirmesi: kısa/basit metin hızlı modele, uzun/karmaşık metin kalite modeline
+    translation_routing_enabled = models.BooleanField(default=True)
+    translation_fast_model = models.CharField(max_length=100, default="gpt-4o-mini", blank=True)
+    translation_quality_model = models.CharField(max_length=100, blank=True)  # boşsa OPENAI_MODEL
+    translation_fast_max_tokens = models.PositiveIntegerField(default=150)
+    translation_fast_max_lines = models.PositiveSmallIntegerField(default=3)
+    translation_fast_timeout = models.PositiveSmallIntegerField(default=20)  # saniye
+    translation_quality_timeout = models.PositiveSmallIntegerField(default=90)  # saniye
     updated_at = models.DateTimeField(auto_now=True)
 
 
@@ -450,6 +465,149 @@ class OCRDocument(models.Model):
         return f"OCR Document {self.id} - {self.user.username}"
 
 
+class OCRCacheEntry(models.Model):
+    """OCR sonuç önbelleği - sayfa görüntüsünün hash'i, motor ve dil ipucu ile anahtarlanır"""
+    key = models.CharField(max_length=64, unique=True)
+    engine = models.CharField(max_length=20)
+    language_hint = models.CharField(max_length=16, blank=True)
+    text = models.TextField(blank=True)
+    confidence = models.FloatField(null=True, blank=True)  # yerel motorun ortalama kelime güveni (0-100)
+    size_bytes = models.PositiveIntegerField(default=0)
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["last_used_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.engine} - {self.key[:12]}"
+
+
+class TranslationMemoryEntry(models.Model):
+    """Çeviri belleği - normalize edilmiş kaynak metin, dil çifti ve model ile anahtarlanır"""
+    key = models.CharField(max_length=64, unique=True)
+    source_language = models.CharField(max_length=8, blank=True)
+    target_language = models.CharField(max_length=8, blank=True)
+    model = models.CharField(max_length=100, blank=True)
+    source_text = models.TextField()
+    translated_text = models.TextField()
+    size_bytes = models.PositiveIntegerField(default=0)
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["last_used_at"]),
+            models.Index(fields=["created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.source_language}->{self.target_language} - {self.key[:12]}"
+
+
+class TranslationCall(models.Model):
+    """Çeviri API çağrı kaydı - hangi rota/model kullanıldı ve ne kadar sürdü"""
+    route = models.CharField(max_length=20)
+    reason = models.CharField(max_length=40, blank=True)
+    model = models.CharField(max_length=100)
+    input_chars = models.PositiveIntegerField(default=0)
+    input_tokens = models.PositiveIntegerField(null=True, blank=True)
+    output_tokens = models.PositiveIntegerField(null=True, blank=True)
+    latency_ms = models.PositiveIntegerField(default=0)
+    ttfb_ms = models.PositiveIntegerField(null=True, blank=True)  # sadece stream çağrıları
+    streamed = models.BooleanField(default=False)
+    ok = models.BooleanField(default=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.route} - {self.model} - {self.latency_ms} ms"
+
+
+class DocumentPage(models.Model):
+    """Sayfa bazlı OCR sonuçları - uzun belgelerde hata sonrası kalınan sayfadan devam edilir"""
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name="pages")
+    page_number = models.PositiveIntegerField()
+    text = models.TextField(blank=True)
+    engine = models.CharField(max_length=20)
+    confidence = models.FloatField(null=True, blank=True)
+    elapsed_ms = models.PositiveIntegerField(default=0)
+    cached = models.BooleanField(default=False)
+    duplicate_of = models.PositiveIntegerField(null=True, blank=True)
+    options_key = models.CharField(max_length=64, blank=True)  # sayfaları yazan OCR işi; başka bir işte geçersiz
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["document", "page_number"]
+        unique_together = ["document", "page_number", "options_key"]
+
+    def __str__(self):
+        return f"Document {self.document_id} - Page {self.page_number}"
+
+
+class GlossaryTerm(models.Model):
+    """Terim sözlüğü - dil çifti başına kaynak terim ve çeviride kullanılması zorunlu karşılığı"""
+    source_language = models.CharField(max_length=8, default="auto")  # "auto": her kaynak dilde geçerli
+    target_language = models.CharField(max_length=8, default="ja")
+    source_term = models.CharField(max_length=255)
+    target_term = models.CharField(max_length=255)
+    note = models.CharField(max_length=255, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["source_language", "target_language", "source_term"]
+        unique_together = ["source_language", "target_language", "source_term"]
+
+    def __str__(self):
+        return f"{self.source_language}->{self.target_language} - {self.source_term}"
+
+
+class OCRJob(models.Model):
+    """Arka planda çalışan OCR işleri (veritabanı tabanlı kuyruk)"""
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name="ocr_jobs")
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="ocr_jobs")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    options = models.JSONField(default=dict, blank=True)  # language_hint, concurrency, mode
+    progress = models.JSONField(default=dict, blank=True)  # total, done, pages
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)  # visibility timeout
+    locked_by = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+        ]
+
+    def __str__(self):
+        return f"OCR Job {self.id} - Document {self.document_id} - {self.status}"
+
+
 # ============================================================================
 # CALCULATOR TOOLS MODELS
 # ============================================================================
@@ -1,6 +1,6 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from .models import UserProfile, PremiumKey, DocumentTemplate, Document, TemplateFill, TemplateField, SiteSettings, UsageLog, PremiumKeyRequest, UserActivityLog, AIChatLog, SupportRequest
+from .models import UserProfile, PremiumKey, DocumentTemplate, Document, TemplateFill, TemplateField, SiteSettings, UsageLog, PremiumKeyRequest, UserActivityLog, AIChatLog, SupportRequest, OCRJob, GlossaryTerm
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -98,6 +98,25 @@ class DocumentSerializer(serializers.ModelSerializer):
         )
 
 
+class OCRJobSerializer(serializers.ModelSerializer):
+    document = DocumentSerializer(read_only=True)
+
+    class Meta:
+        model = OCRJob
+        fields = (
+            "id",
+            "status",
+            "progress",
+            "attempts",
+            "max_attempts",
+            "error",
+            "document",
+            "created_at",
+            "started_at",
+            "finished_at",
+        )
+
+
 class TemplateFillSerializer(serializers.ModelSerializer):
     class Meta:
         model = TemplateFill
@@ -135,6 +154,17 @@ class SiteSettingsSerializer(serializers.ModelSerializer):
             "deepseek_endpoint",
             "blackbox_endpoint",
             "chat_provider",
+            "ocr_adaptive_zoom",
+            "ocr_image_format",
+            "ocr_grayscale",
+            "ocr_jpeg_quality",
+            "translation_routing_enabled",
+            "translation_fast_model",
+            "translation_quality_model",
+            "translation_fast_max_tokens",
+            "translation_fast_max_lines",
+            "translation_fast_timeout",
+            "translation_quality_timeout",
             "theme_primary_color",
             "theme_secondary_color",
             "theme_preset",
@@ -251,3 +281,21 @@ class AIChatLogSerializer(serializers.ModelSerializer):
             "user_agent",
             "created_at",
         )
+
+
+class GlossaryTermSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GlossaryTerm
+        fields = (
+            "id",
+            "source_language",
+            "target_language",
+            "source_term",
+            "target_term",
+            "note",
+            "is_active",
+            "updated_at",
+        )
+        read_only_fields = ("updated_at",)
+        # Saving an existing term updates it (see admin_glossary) instead of failing validation.
+        validators = []
@@ -1,6 +1,6 @@
-import requests
 from django.conf import settings
 from core.models import SiteSettings
+from . import http_client
 
 
 def get_chat_provider_settings():
@@ -77,7 +77,8 @@ def _chat_openai(endpoint, message, system_prompt, api_key):
     if not api_key:
         raise ValueError("OPENAI_API_KEY is missing")
     
-    response = requests.post(
+    response = http_client.post(
+        "openai_chat",
         endpoint,
         headers={
             "Content-Type": "application/json",
@@ -92,7 +93,6 @@ def _chat_openai(endpoint, message, system_prompt, api_key):
             "max_tokens": 500,
             "temperature": 0.7,
         },
-        timeout=30,
     )
     response.raise_for_status()
     data = response.json()
@@ -104,7 +104,8 @@ def _chat_deepseek(endpoint, message, system_prompt, api_key):
     if not api_key:
         raise ValueError("API_KEY is missing for DeepSeek")
     
-    response = requests.post(
+    response = http_client.post(
+        "deepseek",
         endpoint,
         headers={
             "Content-Type": "application/json",
@@ -119,7 +120,6 @@ def _chat_deepseek(endpoint, message, system_prompt, api_key):
             "max_tokens": 500,
             "temperature": 0.7,
         },
-        timeout=30,
     )
     response.raise_for_status()
     data = response.json()
@@ -138,14 +138,14 @@ def _chat_blackbox(endpoint, message, system_prompt, api_key=None, repo_url=""):
     }
     if repo_url:
         payload["repoUrl"] = repo_url
-    response = requests.post(
+    response = http_client.post(
+        "blackbox",
         endpoint,
         headers={
             "Content-Type": "application/json",
             "Authorization": f"Bearer {api_key}",
         },
         json=payload,
-        timeout=30,
     )
     response.raise_for_status()
     data = response.json()
@@ -0,0 +1,337 @@
+"""Chunked translation for long documents.
+
+Text is split on paragraph boundaries, and paragraphs over the token budget
+on sentence boundaries (Japanese 。！？ and Turkish/English . ! ? with common
+abbreviations and ordinals kept intact). Chunks are translated concurrently
+and reassembled in order; each chunk retries on its own, and finished chunks
+land in the translation memory, so a repeated request only redoes the chunks
+that failed.
+
+stream_document streams the first chunk token by token while the remaining
+chunks translate in the background, so the reader sees text within a second
+or two; time to first token is kept as a metric (stream_stats).
+
+translate_incremental keeps paragraph-level state (hash of each source
+paragraph and its translation) so re-translating an edited document only
+sends the paragraphs that changed.
+"""
+import hashlib
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from .openai_service import stream_translation, translate_text
+from .translation_memory import normalize
+from .translation_routing import CJK_RE, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+STREAMS_KEY = "translation_stream:count"
+TTFB_TOTAL_KEY = "translation_stream:ttfb_ms_total"
+TTFB_SAMPLES_KEY = "translation_stream:ttfb_samples"
+TTFB_SAMPLE_SIZE = 200
+
+PARAGRAPH_RE = re.compile(r"\n\s*\n")
+JAPANESE_SENTENCE_END = "。！？!?"
+ABBREVIATIONS = {
+    "dr", "prof", "doç", "av", "müh", "ltd", "şti", "a.ş", "vb", "vs", "no", "nr", "st", "mah", "cad", "sok",
+    "apt", "blv", "tel", "fax", "mr", "mrs", "ms", "co", "inc", "etc", "e.g", "i.e", "vol", "fig",
+}
+
+
+def split_sentences(paragraph):
+    sentences = []
+    start = 0
+    length = len(paragraph)
+    for index, char in enumerate(paragraph):
+        end = index + 1
+        if char in JAPANESE_SENTENCE_END:
+            # Keep closing quotes/brackets with their sentence.
+            while end < length and paragraph[end] in "」』）)\"'":
+                end += 1
+        elif char == "." and end < length and paragraph[end].isspace():
+            word = paragraph[start:index].rsplit(None, 1)[-1].lower() if paragraph[start:index].strip() else ""
+            # "1. madde", "Dr. Yılmaz", "Ltd. Şti." do not end a sentence.
+            if word.isdigit() or word in ABBREVIATIONS or len(word) == 1:
+                continue
+        else:
+            continue
+        if paragraph[start:end].strip():
+            sentences.append(paragraph[start:end].strip())
+        start = end
+    if paragraph[start:].strip():
+        sentences.append(paragraph[start:].strip())
+    return sentences
+
+
+def _joiner(text):
+    return "" if CJK_RE.search(text[-1:] or "") else " "
+
+
+def split_chunks(text, max_tokens=None):
+    """Split text into [(chunk, separator after it)] within the token budget."""
+    max_tokens = max_tokens or settings.TRANSLATION_CHUNK_TOKENS
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    def flush(separator):
+        nonlocal current, current_tokens
+        if current:
+            chunks.append(("".join(current), separator))
+        current = []
+        current_tokens = 0
+
+    for paragraph in (part.strip() for part in PARAGRAPH_RE.split(text)):
+        if not paragraph:
+            continue
+        tokens = estimate_tokens(paragraph)
+        if tokens <= max_tokens:
+            if current and current_tokens + tokens > max_tokens:
+                flush("\n\n")
+            if current:
+                current.append("\n\n")
+            current.append(paragraph)
+            current_tokens += tokens
+            continue
+        # A paragraph over budget is split on sentences; a single sentence
+        # over budget is sent whole rather than cut mid-sentence.
+        flush("\n\n")
+        for sentence in split_sentences(paragraph):
+            sentence_tokens = estimate_tokens(sentence)
+            if current and current_tokens + sentence_tokens > max_tokens:
+                flush(_joiner(current[-1]))
+            if current:
+                current.append(_joiner(current[-1]))
+            current.append(sentence)
+            current_tokens += sentence_tokens
+        flush("\n\n")
+    flush("")
+    if chunks:
+        chunks[-1] = (chunks[-1][0], "")
+    return chunks
+
+
+def _retry_chunk(exc):
+    """Whether a failed chunk is worth another request.
+
+    Read timeouts may still be billed, http_client already retried 429/5xx
+    responses with backoff, and other 4xx responses will not change, so
+    none of them are retried again here.
+    """
+    if isinstance(exc, (ValueError, requests.Timeout, requests.HTTPError)):
+        return False
+    return True
+
+
+def _translate_chunk(index, chunk, source, target):
+    attempts = settings.TRANSLATION_CHUNK_RETRIES + 1
+    try:
+        for attempt in range(1, attempts + 1):
+            try:
+                return translate_text(chunk, source, target)
+            except Exception as exc:
+                if attempt == attempts or not _retry_chunk(exc):
+                    raise
+                logger.warning("Translation chunk %s failed (attempt %s): %s", index, attempt, exc)
+                time.sleep(2 ** (attempt - 1))
+    finally:
+        # Worker threads open their own DB connection for the translation memory.
+        connection.close()
+
+
+def translate_document(text, source, target, concurrency=None, max_tokens=None):
+    """Translate long text chunk by chunk with bounded parallelism, keeping order."""
+    chunks = split_chunks(text, max_tokens)
+    if len(chunks) <= 1:
+        return translate_text(text, source, target)
+    workers = max(1, min(concurrency or settings.TRANSLATION_CONCURRENCY, len(chunks)))
+    logger.info("Translating %s chunks with %s workers", len(chunks), workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_translate_chunk, index, chunk, source, target)
+            for index, (chunk, _) in enumerate(chunks)
+        ]
+        translated = [future.result() for future in futures]
+    return "".join(part + separator for part, (_, separator) in zip(translated, chunks)).strip()
+
+
+def split_paragraphs(text):
+    return [part.strip() for part in PARAGRAPH_RE.split(text) if part.strip()]
+
+
+def paragraph_hash(paragraph):
+    return hashlib.sha256(normalize(paragraph).encode("utf-8")).hexdigest()[:16]
+
+
+def build_segments(hashes, translation):
+    """Segments for paragraphs translated together: one per paragraph when the
+    translation kept the paragraph breaks, otherwise one covering them all."""
+    parts = split_paragraphs(translation)
+    if len(parts) == len(hashes):
+        return [{"hashes": [paragraph_hash], "text": part} for paragraph_hash, part in zip(hashes, parts)]
+    return [{"hashes": list(hashes), "text": translation.strip()}]
+
+
+def segment_state(text, translation, source, target):
+    """Paragraph state for a text translated in one go (e.g. streamed)."""
+    return {
+        "source": source,
+        "target": target,
+        "segments": build_segments([paragraph_hash(paragraph) for paragraph in split_paragraphs(text)], translation),
+    }
+
+
+def _reusable_segments(state, source, target):
+    by_first_hash = {}
+    if not state or state.get("source") != source or state.get("target") != target:
+        return by_first_hash
+    for segment in state.get("segments", []):
+        if segment.get("hashes") and segment.get("text"):
+            by_first_hash.setdefault(segment["hashes"][0], []).append(segment)
+    return by_first_hash
+
+
+def _group_pending(paragraphs, indexes, max_tokens):
+    """Pack consecutive pending paragraphs into groups of at most max_tokens."""
+    groups = []
+    previous = None
+    tokens = 0
+    for index in indexes:
+        paragraph_tokens = estimate_tokens(paragraphs[index])
+        if groups and previous == index - 1 and tokens + paragraph_tokens <= max_tokens:
+            groups[-1].append(index)
+            tokens += paragraph_tokens
+        else:
+            groups.append([index])
+            tokens = paragraph_tokens
+        previous = index
+    return groups
+
+
+def translate_incremental(text, source, target, state=None, concurrency=None, max_tokens=None):
+    """Translate text reusing the paragraphs already translated in state.
+
+    Returns (translated_text, new_state, summary). Paragraphs whose text is
+    unchanged (matched by hash, wherever they moved) are taken from state;
+    only changed or new paragraphs go to the provider, grouped and run
+    concurrently like translate_document, and are spliced back in order.
+    """
+    max_tokens = max_tokens or settings.TRANSLATION_CHUNK_TOKENS
+    paragraphs = split_paragraphs(text)
+    hashes = [paragraph_hash(paragraph) for paragraph in paragraphs]
+    reusable = _reusable_segments(state, source, target)
+
+    slots = []  # (start index, segments); segments None while pending
+    pending = []
+    index = 0
+    while index < len(paragraphs):
+        candidates = [
+            segment for segment in reusable.get(hashes[index], [])
+            if hashes[index:index + len(segment["hashes"])] == segment["hashes"]
+        ]
+        if candidates:
+            segment = max(candidates, key=lambda candidate: len(candidate["hashes"]))
+            slots.append((index, [segment]))
+            index += len(segment["hashes"])
+        else:
+            slots.append((index, None))
+            pending.append(index)
+            index += 1
+
+    translated = {}
+    groups = _group_pending(paragraphs, pending, max_tokens)
+    if groups:
+        work = []
+        for group in groups:
+            for chunk, separator in split_chunks("\n\n".join(paragraphs[i] for i in group), max_tokens):
+                work.append((group[0], chunk, separator))
+        workers = max(1, min(concurrency or settings.TRANSLATION_CONCURRENCY, len(work)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_translate_chunk, number, chunk, source, target)
+                for number, (_, chunk, _) in enumerate(work)
+            ]
+            parts = [future.result() for future in futures]
+        outputs = {}
+        for (first, _, separator), part in zip(work, parts):
+            outputs[first] = outputs.get(first, "") + part + separator
+        for group in groups:
+            for segment in build_segments([hashes[i] for i in group], outputs[group[0]]):
+                translated.setdefault(group[0], []).append(segment)
+
+    segments = []
+    for start, reused in slots:
+        if reused is not None:
+            segments.extend(reused)
+        elif start in translated:
+            # Only the first paragraph of a group carries the group's segments.
+            segments.extend(translated[start])
+    summary = {
+        "paragraphs": len(paragraphs),
+        "translated": len(pending),
+        "reused": len(paragraphs) - len(pending),
+    }
+    logger.info("Incremental translation: %s", summary)
+    new_state = {"source": source, "target": target, "segments": segments}
+    return "\n\n".join(segment["text"] for segment in segments), new_state, summary
+
+
+def stream_document(text, source, target, concurrency=None, max_tokens=None):
+    """Yield the translation of text in order, piece by piece.
+
+    The first chunk is streamed from the provider as it is generated; the
+    remaining chunks are translated concurrently meanwhile and yielded whole,
+    each followed by its separator.
+    """
+    chunks = split_chunks(text, max_tokens)
+    if not chunks:
+        return
+    workers = max(1, min(concurrency or settings.TRANSLATION_CONCURRENCY, len(chunks) - 1))
+    executor = ThreadPoolExecutor(max_workers=workers) if len(chunks) > 1 else None
+    try:
+        futures = [
+            executor.submit(_translate_chunk, index, chunk, source, target)
+            for index, (chunk, _) in enumerate(chunks[1:], start=1)
+        ] if executor else []
+        first, separator = chunks[0]
+        yield from stream_translation(first, source, target)
+        for future, (_, next_separator) in zip(futures, chunks[1:]):
+            part = future.result()
+            yield separator + part
+            separator = next_separator
+    finally:
+        if executor:
+            # The client may disconnect mid-stream: drop chunks nobody will read.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def record_ttfb(elapsed_ms):
+    """Record the time from request to first translated token of one stream."""
+    cache.add(STREAMS_KEY, 0, timeout=None)
+    cache.incr(STREAMS_KEY)
+    cache.add(TTFB_TOTAL_KEY, 0, timeout=None)
+    cache.incr(TTFB_TOTAL_KEY, int(elapsed_ms))
+    samples = cache.get(TTFB_SAMPLES_KEY, [])
+    samples = (samples + [int(elapsed_ms)])[-TTFB_SAMPLE_SIZE:]
+    cache.set(TTFB_SAMPLES_KEY, samples, timeout=None)
+
+
+def stream_stats():
+    streams = cache.get(STREAMS_KEY, 0)
+    samples = sorted(cache.get(TTFB_SAMPLES_KEY, []))
+
+    def percentile(fraction):
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else None
+
+    return {
+        "streams": streams,
+        "ttfb_ms_avg": round(cache.get(TTFB_TOTAL_KEY, 0) / streams) if streams else None,
+        "ttfb_ms_p50": percentile(0.5),
+        "ttfb_ms_p95": percentile(0.95),
+        "ttfb_ms_last": cache.get(TTFB_SAMPLES_KEY, [None])[-1],
+    }
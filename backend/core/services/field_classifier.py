@@ -0,0 +1,107 @@
+"""Decide which template field values need an LLM translation.
+
+Numbers, codes, phone numbers, e-mail addresses, dates and text that is
+already Japanese (for Japanese output) are answered locally: passed through
+unchanged or, for dates, reformatted for the target language.
+"""
+import re
+from datetime import date
+
+NUMERIC_RE = re.compile(r"^[+\-]?[\d\s.,]+\s*(%|円|¥|\$|€|₺|TL|JPY|TRY|USD|EUR)?$", re.IGNORECASE)
+# Postal codes, phone/fax numbers, IDs: digits with separators only.
+CODE_RE = re.compile(r"^[〒#№+]?[\d\s\-–ー()（）./:]+$")
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+URL_RE = re.compile(r"^(https?://|www\.)\S+$", re.IGNORECASE)
+YMD_RE = re.compile(r"^(\d{4})\s*[-/.年]\s*(\d{1,2})\s*[-/.月]\s*(\d{1,2})\s*日?$")
+DMY_RE = re.compile(r"^(\d{1,2})[./-](\d{1,2})[./-](\d{4})$")
+# "1 Nisan 2024" / "1 April 2024", and slash dates such as "01/02/2024" whose
+# day/month order is ambiguous, are only trusted for date fields.
+NAMED_MONTH_RE = re.compile(r"^(\d{1,2})\s+([^\W\d_]+)\s+(\d{4})$", re.UNICODE)
+MONTHS = {
+    name: index
+    for index, names in enumerate(
+        [
+            ("ocak", "january", "jan"),
+            ("şubat", "subat", "february", "feb"),
+            ("mart", "march", "mar"),
+            ("nisan", "april", "apr"),
+            ("mayıs", "mayis", "may"),
+            ("haziran", "june", "jun"),
+            ("temmuz", "july", "jul"),
+            ("ağustos", "agustos", "august", "aug"),
+            ("eylül", "eylul", "september", "sep"),
+            ("ekim", "october", "oct"),
+            ("kasım", "kasim", "november", "nov"),
+            ("aralık", "aralik", "december", "dec"),
+        ],
+        start=1,
+    )
+    for name in names
+}
+# Anything that is not a letter carries no language.
+NEUTRAL_RE = re.compile(r"[\W\d_]+", re.UNICODE)
+JAPANESE_RE = re.compile(r"^[぀-ヿㇰ-ㇿ㐀-䶿一-鿿豈-﫿ｦ-ﾟ々〆ヵヶ]+$")
+
+
+def parse_date(value, date_field=False):
+    """Return a date for YYYY-MM-DD / YYYY年M月D日 / DD.MM.YYYY style values, else None.
+
+    With date_field, "1 Nisan 2024" and DD/MM/YYYY values are accepted as well.
+    """
+    match = YMD_RE.match(value)
+    named = NAMED_MONTH_RE.match(value) if date_field else None
+    if match:
+        year, month, day = (int(part) for part in match.groups())
+    elif named and named.group(2).lower() in MONTHS:
+        day, month, year = int(named.group(1)), MONTHS[named.group(2).lower()], int(named.group(3))
+    else:
+        match = DMY_RE.match(value)
+        if not match or ("/" in value and not date_field):
+            return None
+        day, month, year = (int(part) for part in match.groups())
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def format_date(value, target):
+    if target == "ja":
+        return f"{value.year}年{value.month}月{value.day}日"
+    if target == "tr":
+        return value.strftime("%d.%m.%Y")
+    return value.isoformat()
+
+
+def is_japanese(value):
+    letters = NEUTRAL_RE.sub("", value)
+    return bool(letters) and bool(JAPANESE_RE.match(letters))
+
+
+def local_translation(value, field_type, target):
+    """Return the output for a value that needs no LLM call, or None if it must be translated."""
+    text = value.strip()
+    if not text:
+        return ""
+    parsed = parse_date(text, date_field=field_type == "date")
+    if parsed:
+        return format_date(parsed, target)
+    # A number field with words in it ("12 adet") still goes to translation.
+    if NUMERIC_RE.match(text) or CODE_RE.match(text) or EMAIL_RE.match(text) or URL_RE.match(text):
+        return value
+    if target == "ja" and is_japanese(text):
+        return value
+    return None
+
+
+def split_for_translation(values, field_types, target):
+    """Split {key: text} into (answered locally, needs translation)."""
+    ready = {}
+    pending = {}
+    for key, value in values.items():
+        local = local_translation(value, field_types.get(key, "text"), target)
+        if local is None:
+            pending[key] = value
+        else:
+            ready[key] = local
+    return ready, pending
@@ -0,0 +1,214 @@
+"""Terminology glossary applied to every translation.
+
+Active GlossaryTerm rows for a language pair are compiled into an
+Aho-Corasick automaton kept in process memory, so finding terms is a single
+pass over the text however large the glossary is. A text that is exactly a
+glossary term is answered locally; terms found inside a longer text are
+sent to the model as required translations.
+
+Each process reads the glossary's version (row count and latest updated_at,
+so additions, edits and deletes all change it) from the database at most
+every GLOSSARY_REFRESH_SECONDS, and rebuilds the automaton for a pair the
+next time that pair is used after it changed.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Count, Max
+from core.models import GlossaryTerm
+
+logger = logging.getLogger(__name__)
+
+_automata = {}
+_lock = threading.Lock()
+_version = {"value": None, "checked_at": float("-inf")}
+
+
+def normalize(text):
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text).casefold()).strip()
+
+
+def _word_char(char):
+    # Latin/Turkish letters and digits need word boundaries; CJK terms match anywhere.
+    return char.isalnum() and char < "⺀"
+
+
+class TermAutomaton:
+    """Aho-Corasick automaton over normalized source terms."""
+
+    def __init__(self, entries):
+        self.terms = {}
+        goto = [{}]
+        terminal = [None]
+        for source_term, target_term in entries:
+            key = normalize(source_term)
+            if not key or key in self.terms:
+                continue
+            self.terms[key] = (source_term, target_term)
+            node = 0
+            for char in key:
+                child = goto[node].get(char)
+                if child is None:
+                    child = len(goto)
+                    goto[node][char] = child
+                    goto.append({})
+                    terminal.append(None)
+                node = child
+            terminal[node] = key
+
+        fail = [0] * len(goto)
+        # Nearest proper suffix state that ends a term, -1 if none.
+        output = [-1] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                output[child] = fail[child] if terminal[fail[child]] is not None else output[fail[child]]
+        self._goto, self._fail, self._terminal, self._output = goto, fail, terminal, output
+
+    def __len__(self):
+        return len(self.terms)
+
+    def exact(self, text):
+        """(source_term, target_term) when text is exactly one term, else None."""
+        return self.terms.get(normalize(text))
+
+    def find(self, text):
+        """Terms in text, leftmost-longest and non-overlapping, each listed once."""
+        if not self.terms:
+            return []
+        text = normalize(text)
+        goto, fail, terminal, output = self._goto, self._fail, self._terminal, self._output
+        matches = []
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            hit = node if terminal[node] is not None else output[node]
+            while hit > 0:
+                key = terminal[hit]
+                matches.append((index + 1 - len(key), index + 1, key))
+                hit = output[hit]
+
+        matches.sort(key=lambda match: (match[0], -match[1]))
+        found = {}
+        last_end = 0
+        for start, end, key in matches:
+            if start < last_end:
+                continue
+            if _word_char(key[0]) and start > 0 and _word_char(text[start - 1]):
+                continue
+            if _word_char(key[-1]) and end < len(text) and _word_char(text[end]):
+                continue
+            found.setdefault(key, self.terms[key])
+            last_end = end
+        return list(found.values())
+
+
+def _current_version():
+    now = time.monotonic()
+    if now - _version["checked_at"] >= settings.GLOSSARY_REFRESH_SECONDS:
+        try:
+            state = GlossaryTerm.objects.aggregate(count=Count("id"), updated=Max("updated_at"))
+        except DatabaseError as exc:
+            logger.warning("Could not check glossary version: %s", exc)
+        else:
+            updated = state["updated"].isoformat() if state["updated"] else ""
+            _version["value"] = f"{state['count']}:{updated}"
+        _version["checked_at"] = now
+    return _version["value"]
+
+
+def _load_entries(source, target):
+    terms = GlossaryTerm.objects.filter(target_language=target, is_active=True)
+    if source != "auto":
+        terms = terms.filter(source_language__in=[source, "auto"])
+    rows = terms.order_by("id").values_list("source_language", "source_term", "target_term")
+    # Pair-specific terms win over "auto" ones with the same source text.
+    return [(source_term, target_term) for _, source_term, target_term in sorted(rows, key=lambda row: row[0] == "auto")]
+
+
+def get_automaton(source, target):
+    source = source or "auto"
+    version = _current_version()
+    cached = _automata.get((source, target))
+    if cached and cached[0] == version:
+        return cached[1]
+    with _lock:
+        cached = _automata.get((source, target))
+        if cached and cached[0] == version:
+            return cached[1]
+        started = time.perf_counter()
+        try:
+            automaton = TermAutomaton(_load_entries(source, target))
+        except DatabaseError as exc:
+            logger.warning("Glossary unavailable, translating without it: %s", exc)
+            return TermAutomaton(())
+        _automata[(source, target)] = (version, automaton)
+        logger.info(
+            "Compiled %s glossary terms for %s->%s in %.1f ms",
+            len(automaton), source, target, (time.perf_counter() - started) * 1000,
+        )
+        return automaton
+
+
+def exact_match(text, source, target):
+    """The glossary translation when text is exactly a glossary term, else None."""
+    if not settings.GLOSSARY_ENABLED or not text.strip():
+        return None
+    match = get_automaton(source, target).exact(text)
+    return match[1] if match else None
+
+
+def find_terms(text, source, target):
+    """[(source_term, target_term)] for the glossary terms used in text."""
+    if not settings.GLOSSARY_ENABLED or not text.strip():
+        return []
+    return get_automaton(source, target).find(text)
+
+
+def prompt_constraints(terms):
+    """Prompt block asking the model to use the given term translations; "" when there are none."""
+    if not terms:
+        return ""
+    lines = "\n".join(f"- {source_term} => {target_term}" for source_term, target_term in terms)
+    return f"Glossary (always translate these terms exactly as given):\n{lines}\n\n"
+
+
+def constraints_fingerprint(constraints):
+    """Short hash of a constraints block, so remembered translations follow glossary edits."""
+    return hashlib.sha256(constraints.encode("utf-8")).hexdigest()[:12] if constraints else ""
+
+
+def invalidate():
+    """Re-read the glossary version on next use; called when glossary terms change.
+
+    Other processes see the change within GLOSSARY_REFRESH_SECONDS.
+    """
+    _version["checked_at"] = float("-inf")
+
+
+def status():
+    version = _current_version()
+    return {
+        "enabled": settings.GLOSSARY_ENABLED,
+        "version": version,
+        "compiled_pairs": {
+            f"{source}->{target}": len(automaton)
+            for (source, target), (built_for, automaton) in list(_automata.items())
+            if built_for == version
+        },
+        "terms": GlossaryTerm.objects.filter(is_active=True).count(),
+    }
@@ -0,0 +1,102 @@
+"""Shared HTTP client for the external providers (OpenAI, Vision, chat).
+
+One pooled requests.Session per host is kept for the life of the process, so
+repeated calls reuse kept-alive TCP/TLS connections instead of handshaking
+every time. Throttling (429), 5xx answers and connection failures are retried
+with exponential backoff and full jitter, honoring Retry-After.
+"""
+import email.utils
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _provider_timeouts():
+    # (connect, read) seconds per provider.
+    connect = settings.HTTP_CONNECT_TIMEOUT
+    return {
+        "openai": (connect, settings.OPENAI_TIMEOUT),
+        "openai_chat": (connect, settings.CHAT_TIMEOUT),
+        "vision": (connect, settings.OCR_VISION_TIMEOUT),
+        "deepseek": (connect, settings.CHAT_TIMEOUT),
+        "blackbox": (connect, settings.CHAT_TIMEOUT),
+    }
+
+
+def get_session(url):
+    """The process-wide pooled session for url's host."""
+    parts = urlsplit(url)
+    host = f"{parts.scheme}://{parts.netloc}"
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            # Retries are handled in post() so Retry-After and jitter apply.
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.HTTP_POOL_MAXSIZE, max_retries=0)
+            session.mount(host, adapter)
+            _sessions[host] = session
+        return session
+
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, response=None):
+    """Seconds to wait before retry number `attempt` (1-based)."""
+    retry_after = _retry_after(response)
+    if retry_after is not None:
+        return min(retry_after, settings.HTTP_BACKOFF_MAX)
+    return random.uniform(0, min(settings.HTTP_BACKOFF_MAX, settings.HTTP_BACKOFF_BASE * 2 ** attempt))
+
+
+def post(provider, url, retries=None, **kwargs):
+    """POST through the pooled session for url's host, retrying transient failures.
+
+    Returns the last response (callers still call raise_for_status) or raises
+    the last connection error. Read timeouts are not retried: the provider may
+    still be working on (and billing for) the request.
+    """
+    kwargs.setdefault("timeout", _provider_timeouts().get(provider, (settings.HTTP_CONNECT_TIMEOUT, 60)))
+    retries = settings.HTTP_MAX_RETRIES if retries is None else retries
+    session = get_session(url)
+    for attempt in range(1, retries + 2):
+        response = None
+        try:
+            response = session.post(url, **kwargs)
+        except requests.ConnectionError as exc:
+            # Covers refused/reset connections and connect timeouts (not read timeouts).
+            if attempt > retries:
+                raise
+            error = exc
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt > retries:
+                return response
+            error = f"HTTP {response.status_code}"
+            if kwargs.get("stream"):
+                response.close()
+        delay = backoff_delay(attempt, response)
+        logger.warning("%s request failed (%s), retry %s/%s in %.1fs", provider, error, attempt, retries, delay)
+        time.sleep(delay)
@@ -0,0 +1,103 @@
+import hashlib
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.utils import timezone
+from core.models import OCRCacheEntry
+
+HITS_KEY = "ocr_cache:hits"
+MISSES_KEY = "ocr_cache:misses"
+EVICT_KEY = "ocr_cache:evicted"
+
+
+def page_cache_key(raster_digest, engine, language_hint=None):
+    return hashlib.sha256(f"{raster_digest}|{engine}|{language_hint or ''}".encode("utf-8")).hexdigest()
+
+
+def lookup(keys):
+    """Return {key: (text, confidence)} for the cached keys and mark them as used."""
+    if not settings.OCR_CACHE_ENABLED or not keys:
+        return {}
+    found = {
+        key: (text, confidence)
+        for key, text, confidence in OCRCacheEntry.objects.filter(key__in=keys).values_list("key", "text", "confidence")
+    }
+    if found:
+        OCRCacheEntry.objects.filter(key__in=found.keys()).update(
+            hit_count=F("hit_count") + 1,
+            last_used_at=timezone.now(),
+        )
+    return found
+
+
+def store(entries):
+    """Persist (key, engine, language_hint, text, confidence) tuples, evicting old entries now and then."""
+    if not settings.OCR_CACHE_ENABLED or not entries:
+        return
+    OCRCacheEntry.objects.bulk_create(
+        [
+            OCRCacheEntry(
+                key=key,
+                engine=engine,
+                language_hint=language_hint or "",
+                text=text,
+                confidence=confidence,
+                size_bytes=len(text.encode("utf-8")),
+            )
+            for key, engine, language_hint, text, confidence in entries
+        ],
+        ignore_conflicts=True,
+    )
+    # Evict at most every five minutes rather than after every batch of pages.
+    if cache.add(EVICT_KEY, 1, timeout=300):
+        evict()
+
+
+def evict():
+    cutoff = timezone.now() - timedelta(days=settings.OCR_CACHE_MAX_AGE_DAYS)
+    OCRCacheEntry.objects.filter(last_used_at__lt=cutoff).delete()
+    stale_ids = list(
+        OCRCacheEntry.objects.order_by("-last_used_at").values_list("id", flat=True)[settings.OCR_CACHE_MAX_ENTRIES:]
+    )
+    if stale_ids:
+        OCRCacheEntry.objects.filter(id__in=stale_ids).delete()
+
+
+def _incr(key, amount):
+    # Counters live in the shared cache (CACHE_BACKEND) so the OCR worker's
+    # hits and misses show up in admin/ocr-status/ served by gunicorn.
+    if not amount:
+        return
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # Evicted between add and incr (cache culling or clear).
+        cache.set(key, amount, timeout=None)
+
+
+def record(hits=0, misses=0):
+    _incr(HITS_KEY, hits)
+    _incr(MISSES_KEY, misses)
+
+
+def stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    totals = OCRCacheEntry.objects.aggregate(size_bytes=Sum("size_bytes"), stored_hits=Sum("hit_count"))
+    return {
+        "enabled": settings.OCR_CACHE_ENABLED,
+        "entries": OCRCacheEntry.objects.count(),
+        "size_bytes": totals["size_bytes"] or 0,
+        "stored_hits": totals["stored_hits"] or 0,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+    }
+
+
+def purge():
+    deleted, _ = OCRCacheEntry.objects.all().delete()
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+    return deleted
@@ -0,0 +1,275 @@
+import logging
+import os
+import socket
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from core.models import DocumentPage, OCRJob
+from .ocr_service import (
+    join_page_texts,
+    page_timings,
+    parse_page_ranges,
+    parse_regions,
+    run_ocr_pages,
+    skipped_pages,
+)
+from .spreadsheet_service import extract_spreadsheet_text, parse_sheet_selection
+from .usage import increment_usage
+
+logger = logging.getLogger(__name__)
+
+JOB_OPTION_KEYS = ("language_hint", "concurrency", "mode", "pages", "regions", "sheets")
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _same_work(options, other):
+    return {key: value for key, value in options.items() if key != "concurrency"} == {
+        key: value for key, value in other.items() if key != "concurrency"
+    }
+
+
+def enqueue_ocr_job(document, user, options):
+    """Queue OCR for a document, reusing a queued or running job for the same pages and regions.
+
+    Raises ValueError for an invalid page range, region or sheet selection.
+    """
+    options = {key: options.get(key) for key in JOB_OPTION_KEYS if options.get(key) not in (None, "", [])}
+    parse_page_ranges(options.get("pages"))
+    parse_regions(options.get("regions"))
+    parse_sheet_selection(options.get("sheets"))
+    for active in OCRJob.objects.filter(document=document, status__in=["queued", "running"]):
+        if _same_work(active.options, options):
+            return active
+    return OCRJob.objects.create(
+        document=document,
+        user=user,
+        options=options,
+        max_attempts=settings.OCR_JOB_MAX_ATTEMPTS,
+    )
+
+
+def _lease_until():
+    return timezone.now() + timedelta(seconds=settings.OCR_JOB_VISIBILITY_TIMEOUT)
+
+
+def claim_next_job(worker_id):
+    """Lease the next runnable job, or return None.
+
+    A job is runnable when it is queued and due, or when it is running but its
+    lease (visibility timeout) expired because its worker died. The claim is a
+    conditional UPDATE, so two workers can never lease the same job.
+    """
+    now = timezone.now()
+    runnable = Q(status="queued", available_at__lte=now) | Q(status="running", locked_until__lt=now)
+    for job_id in OCRJob.objects.filter(runnable).order_by("available_at").values_list("id", flat=True)[:10]:
+        claimed = OCRJob.objects.filter(runnable, id=job_id).update(
+            status="running",
+            locked_by=worker_id,
+            locked_until=_lease_until(),
+            attempts=F("attempts") + 1,
+            started_at=now,
+        )
+        if claimed:
+            return OCRJob.objects.select_related("document", "user").get(id=job_id)
+    return None
+
+
+def run_job_now(job, worker_id="inline"):
+    """Run a queued job on the current thread (used when OCR_ASYNC is off).
+
+    There is no worker to pick up a retry, so a failure fails the job for
+    the caller to see instead of leaving it queued.
+    """
+    claimed = OCRJob.objects.filter(id=job.id, status="queued").update(
+        status="running",
+        locked_by=worker_id,
+        locked_until=_lease_until(),
+        attempts=F("attempts") + 1,
+        started_at=timezone.now(),
+    )
+    job.refresh_from_db()
+    if claimed:
+        process_job(job, retry=False)
+    return job
+
+
+def count_pages(document, pages=None):
+    """Number of pages OCR will visit, given an optional page selection."""
+    if document.file_type == "pdf":
+        import fitz
+
+        with fitz.open(document.file.path) as pdf_document:
+            total = pdf_document.page_count
+    elif document.file_type == "image":
+        total = 1
+    else:
+        return 0
+    if pages is None:
+        return total
+    return sum(1 for number in pages if number <= total)
+
+
+def _checkpoint_key(job):
+    return f"job:{job.id}"
+
+
+def _stored_result(page):
+    result = {
+        "page": page.page_number,
+        "text": page.text,
+        "engine": page.engine,
+        "elapsed_ms": page.elapsed_ms,
+        "batch_size": 0,
+        "cached": page.cached,
+        "confidence": page.confidence,
+    }
+    if page.duplicate_of:
+        result["duplicate_of"] = page.duplicate_of
+    return result
+
+
+def _stored_pages(job, pages=None):
+    stored = DocumentPage.objects.filter(document=job.document, options_key=_checkpoint_key(job))
+    if pages is not None:
+        stored = stored.filter(page_number__in=pages)
+    return [_stored_result(page) for page in stored]
+
+
+def load_checkpoint(job, pages=None):
+    """Page results stored by earlier attempts of this job.
+
+    Pages of jobs that are no longer queued or running are discarded; pages
+    of another job still working on the document are left alone.
+    """
+    active = OCRJob.objects.filter(document=job.document, status__in=["queued", "running"])
+    DocumentPage.objects.filter(document=job.document).exclude(
+        options_key__in=[_checkpoint_key(other) for other in active]
+    ).delete()
+    return _stored_pages(job, pages)
+
+
+def save_page(job, page):
+    DocumentPage.objects.update_or_create(
+        document=job.document,
+        page_number=page["page"],
+        options_key=_checkpoint_key(job),
+        defaults={
+            "text": page["text"],
+            "engine": page["engine"],
+            "confidence": page.get("confidence"),
+            "elapsed_ms": page.get("elapsed_ms", 0),
+            "cached": page.get("cached", False),
+            "duplicate_of": page.get("duplicate_of"),
+        },
+    )
+
+
+def extract_document_text(document, options, on_page=None, skip_pages=None):
+    """Return (text, page_results, details) for a document, leaving out pages in skip_pages.
+
+    details is the spreadsheet summary for xlsx/xls files and empty otherwise.
+    """
+    if document.file_type in ["pdf", "image"]:
+        pages = run_ocr_pages(
+            document.file.path,
+            document.file_type,
+            options.get("language_hint"),
+            concurrency=options.get("concurrency"),
+            mode=options.get("mode", "hybrid"),
+            on_page=on_page,
+            skip_pages=skip_pages,
+            pages=parse_page_ranges(options.get("pages")),
+            regions=parse_regions(options.get("regions")),
+        )
+        return join_page_texts(pages), pages, {}
+    if document.file_type == "xlsx":
+        text, summary = extract_spreadsheet_text(document.file.path, parse_sheet_selection(options.get("sheets")))
+        return text, [], summary
+    raise ValueError("Unsupported file type.")
+
+
+def _retry_or_fail(job, error, retry=True):
+    job.error = error
+    job.locked_until = None
+    if retry and job.attempts < job.max_attempts:
+        job.status = "queued"
+        job.available_at = timezone.now() + timedelta(seconds=settings.OCR_JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+    else:
+        job.status = "failed"
+        job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "locked_until", "available_at", "finished_at", "updated_at"])
+
+
+def process_job(job, retry=True):
+    """Run a leased job to completion, checkpointing each page as it finishes.
+
+    Pages stored by an earlier attempt are not OCR'd again, and the document
+    text is assembled from the stored pages. With retry=False a failure marks
+    the job failed at once instead of queueing another attempt.
+    """
+    if job.attempts > job.max_attempts:
+        _retry_or_fail(job, job.error or "OCR job lease expired too many times.", retry)
+        return job
+
+    document = job.document
+    stored = []
+    try:
+        selected = parse_page_ranges(job.options.get("pages"))
+        # Crops are one-off extractions: their text must not stand in for whole pages.
+        checkpointing = not job.options.get("regions")
+        stored = load_checkpoint(job, selected) if checkpointing else []
+        if stored:
+            logger.info("OCR job %s resuming document %s with %s stored pages", job.id, document.id, len(stored))
+        job.progress = {
+            "total": count_pages(document, selected),
+            "done": len(stored),
+            "resumed": len(stored),
+            "pages": page_timings(stored),
+        }
+        job.save(update_fields=["progress", "updated_at"])
+
+        def on_page(page):
+            if checkpointing:
+                save_page(job, page)
+            job.progress["done"] += 1
+            job.progress["pages"].append(page_timings([page])[0])
+            # Each finished page renews the lease, so only a stalled worker loses the job.
+            job.locked_until = _lease_until()
+            job.save(update_fields=["progress", "locked_until", "updated_at"])
+
+        text, pages, details = extract_document_text(document, job.options, on_page, {page["page"] for page in stored})
+    except Exception as exc:
+        logger.exception("OCR job %s failed on attempt %s", job.id, job.attempts)
+        _retry_or_fail(job, str(exc), retry)
+        return job
+    if checkpointing and document.file_type in ["pdf", "image"]:
+        pages = _stored_pages(job, selected)
+        text = join_page_texts(pages)
+
+    document.extracted_text = text
+    document.status = "ocr_done"
+    document.save(update_fields=["extracted_text", "status"])
+
+    timings = page_timings(pages)
+    job.status = "done"
+    job.error = ""
+    job.locked_until = None
+    job.finished_at = timezone.now()
+    skipped = skipped_pages(pages)
+    job.progress = {
+        "total": len(timings),
+        "done": len(timings),
+        "resumed": len(stored),
+        "pages": timings,
+        "skipped": skipped,
+    }
+    if details:
+        job.progress["spreadsheet"] = details
+    job.save(update_fields=["status", "error", "locked_until", "finished_at", "progress", "updated_at"])
+    if job.user:
+        increment_usage(job.user, "ocr", {"document": document.id, "job": job.id, "pages": timings, "skipped": skipped})
+    return job
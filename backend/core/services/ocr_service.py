@@ -1,32 +1,322 @@
 import base64
+import hashlib
 import io
 import logging
-from PIL import Image
-from .utils import request_google_vision_text
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from django.conf import settings
+from PIL import Image, ImageOps
+from core.models import SiteSettings
+from . import ocr_cache, tesseract_pool, vision_breaker
+from .utils import VisionImageError, get_google_vision_key, request_google_vision_batch
 
 logger = logging.getLogger(__name__)
 
+# Process-wide cap on OCR calls in flight at once, shared by all requests in this worker.
+_ocr_slots = threading.BoundedSemaphore(settings.OCR_MAX_CONCURRENCY)
 
-def image_file_to_base64(file_path):
-    with open(file_path, "rb") as file_obj:
-        return base64.b64encode(file_obj.read()).decode("utf-8")
+OCR_ENGINES = ("google_vision", "tesseract")
+# Page results answered without running an OCR engine.
+PREPASS_ENGINES = ("text_layer", "blank", "duplicate")
+
+
+# Legacy rendering: fixed zoom, RGB PNG. SiteSettings defaults (get_render_options) enable adaptive zoom.
+DEFAULT_RENDER_OPTIONS = {
+    "adaptive_zoom": False,
+    "image_format": "png",
+    "grayscale": False,
+    "jpeg_quality": 85,
+}
+
+
+def get_render_options():
+    site_settings = SiteSettings.objects.first()
+    if not site_settings:
+        return dict(DEFAULT_RENDER_OPTIONS, adaptive_zoom=True)
+    return {
+        "adaptive_zoom": site_settings.ocr_adaptive_zoom,
+        "image_format": "jpeg" if site_settings.ocr_image_format == "jpeg" else "png",
+        "grayscale": site_settings.ocr_grayscale,
+        "jpeg_quality": min(max(site_settings.ocr_jpeg_quality or 85, 30), 95),
+    }
+
+
+def _encode_image(image, image_format="png", jpeg_quality=85):
+    buffer = io.BytesIO()
+    if image_format == "jpeg":
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(buffer, format="JPEG", quality=jpeg_quality, optimize=True)
+    else:
+        image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class OCRPage:
+    """A page queued for OCR.
+
+    Local engines read the raw pixels directly; the base64 payload Vision
+    needs is only encoded when a Vision request is actually made.
+    """
+
+    def __init__(self, number, image=None, data=None, text_layer="", image_format="png", jpeg_quality=85):
+        self.number = number
+        self.image = image
+        self.data = data
+        self.text_layer = text_layer
+        self.image_format = image_format
+        self.jpeg_quality = jpeg_quality
+        self._payload = None
+        self._digest = None
+
+    @property
+    def needs_ocr(self):
+        return self.image is not None or self.data is not None
+
+    def pixels(self):
+        if self.image is None and self.data is not None:
+            self.image = Image.open(io.BytesIO(self.data))
+        return self.image
+
+    @property
+    def payload(self):
+        if self._payload is None:
+            data = self.data
+            if data is None:
+                data = self._encode_within_limit()
+            self._payload = base64.b64encode(data).decode("utf-8")
+        return self._payload
+
+    def _encode_within_limit(self):
+        """Encode the page, switching to JPEG and then downscaling until it fits Vision's payload cap."""
+        image = self.image
+        image_format = self.image_format
+        data = _encode_image(image, image_format, self.jpeg_quality)
+        while len(data) * 4 // 3 > settings.OCR_VISION_MAX_IMAGE_BYTES and min(image.size) > 200:
+            if image_format != "jpeg":
+                image_format = "jpeg"
+            else:
+                image = image.resize((image.width * 3 // 4, image.height * 3 // 4), Image.LANCZOS)
+            data = _encode_image(image, image_format, self.jpeg_quality)
+        return data
+
+    def raster_digest(self):
+        # Kept after release(): duplicate screening and the OCR cache both need it.
+        if self._digest is None:
+            if self.data is not None:
+                self._digest = hashlib.sha256(self.data).hexdigest()
+            else:
+                digest = hashlib.sha256(f"{self.image.mode}{self.image.size}{self.image_format}".encode("utf-8"))
+                digest.update(self.image.tobytes())
+                self._digest = digest.hexdigest()
+        return self._digest
+
+    def release(self):
+        self.image = None
+        self.data = None
+        self._payload = None
+
+
+def choose_zoom(page, adaptive=True):
+    """Pick a render zoom from the page size, embedded scan resolution and text size."""
+    if not adaptive:
+        return settings.OCR_BASE_ZOOM
+    zoom = settings.OCR_BASE_ZOOM
+    page_area = page.rect.width * page.rect.height
+    # Rendering above the resolution of a full-page scan adds bytes, not detail.
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info["bbox"]
+        if x1 - x0 > 0 and (x1 - x0) * (y1 - y0) >= page_area / 2:
+            zoom = min(zoom, info["width"] / (x1 - x0))
+    # Small print needs more pixels per glyph to be read reliably.
+    sizes = [
+        span["size"]
+        for block in page.get_text("dict")["blocks"]
+        for line in block.get("lines", [])
+        for span in line["spans"]
+        if span["text"].strip()
+    ]
+    if sizes:
+        zoom = max(zoom, settings.OCR_MIN_TEXT_PX / min(sizes))
+    max_zoom = min(settings.OCR_MAX_ZOOM, (settings.OCR_MAX_PIXELS / page_area) ** 0.5)
+    return max(settings.OCR_MIN_ZOOM, min(zoom, max_zoom))
+
+
+def parse_page_ranges(value):
+    """Parse "1-3,7", 3 or [1, 2, 3] into a set of 1-based page numbers; empty selects every page."""
+    if value in (None, "", []):
+        return None
+    if isinstance(value, str):
+        parts = value.split(",")
+    elif isinstance(value, int) and not isinstance(value, bool):
+        parts = [value]
+    elif isinstance(value, list):
+        parts = value
+    else:
+        raise ValueError("pages must be a page range string, a page number or a list.")
+    pages = set()
+    for part in parts:
+        start, _, end = str(part).strip().partition("-")
+        try:
+            start = int(start)
+            end = int(end) if end else start
+        except ValueError:
+            raise ValueError(f"Invalid page range: {part}") from None
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid page range: {part}")
+        if end - start >= settings.OCR_MAX_SELECTED_PAGES:
+            raise ValueError(f"Page range too large: {part}")
+        pages.update(range(start, end + 1))
+    return pages
+
+
+def parse_regions(value):
+    """Parse crop regions into {page number or None: (x0, y0, x1, y1)}.
+
+    Each region is {"x", "y", "width", "height"} in 0-1 page-relative units,
+    with an optional "page"; a region without a page applies to every page.
+    """
+    if not value:
+        return {}
+    if not isinstance(value, list):
+        raise ValueError("regions must be a list.")
+    regions = {}
+    for region in value:
+        try:
+            page = int(region["page"]) if region.get("page") not in (None, "") else None
+            x, y = float(region["x"]), float(region["y"])
+            width, height = float(region["width"]), float(region["height"])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            raise ValueError("Each region needs numeric x, y, width and height.") from None
+        if not (0 <= x < 1 and 0 <= y < 1 and width > 0 and height > 0):
+            raise ValueError("Region coordinates must be between 0 and 1.")
+        if page in regions:
+            raise ValueError("Only one region per page is supported.")
+        regions[page] = (x, y, min(1.0, x + width), min(1.0, y + height))
+    return regions
+
+
+def _region_for(regions, page_number):
+    if not regions:
+        return None
+    return regions.get(page_number, regions.get(None))
 
 
-def pdf_to_images_base64(file_path, zoom=2):
+def iter_pdf_pages(
+    file_path, text_layer_min_chars=None, render_options=None, skip_pages=None, pages=None, regions=None
+):
+    """Yield an OCRPage per PDF page, rendering one page at a time.
+
+    Only page numbers in `pages` (all when None) are visited and those in
+    skip_pages (e.g. already checkpointed) are left out. A region from
+    `regions` clips both the text layer and the rendered pixmap to that box.
+    When text_layer_min_chars is set, pages whose embedded text layer has at
+    least that many characters are not rendered and carry only the text layer.
+    Each pixmap is released right after conversion, so memory is bounded by the
+    pages the caller keeps alive rather than by the page count.
+    """
     try:
         import fitz
     except ImportError as exc:
         raise ImportError("PyMuPDF (fitz) is required for PDF OCR.") from exc
-    pdf_document = fitz.open(file_path)
-    images = []
-    for page in pdf_document:
-        mat = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=mat)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG")
-        images.append(base64.b64encode(buffer.getvalue()).decode("utf-8"))
-    return images
+    options = render_options or DEFAULT_RENDER_OPTIONS
+    colorspace = fitz.csGRAY if options["grayscale"] else fitz.csRGB
+    mode = "L" if options["grayscale"] else "RGB"
+    with fitz.open(file_path) as pdf_document:
+        numbers = range(1, pdf_document.page_count + 1)
+        if pages is not None:
+            numbers = sorted(number for number in pages if number <= pdf_document.page_count)
+        for index in numbers:
+            if skip_pages and index in skip_pages:
+                continue
+            page = pdf_document.load_page(index - 1)
+            clip = None
+            region = _region_for(regions, index)
+            if region:
+                rect = page.rect
+                clip = fitz.Rect(
+                    rect.x0 + region[0] * rect.width,
+                    rect.y0 + region[1] * rect.height,
+                    rect.x0 + region[2] * rect.width,
+                    rect.y0 + region[3] * rect.height,
+                )
+            if text_layer_min_chars:
+                text_layer = page.get_text("text", clip=clip).strip()
+                if len(text_layer) >= text_layer_min_chars:
+                    yield OCRPage(index, text_layer=text_layer)
+                    continue
+            zoom = choose_zoom(page, options["adaptive_zoom"])
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=colorspace, alpha=False, clip=clip)
+            img = Image.frombytes(mode, [pix.width, pix.height], pix.samples)
+            pix = None
+            logger.debug("Rendered page %s at zoom %.2f (%sx%s)", index, zoom, img.width, img.height)
+            yield OCRPage(index, image=img, image_format=options["image_format"], jpeg_quality=options["jpeg_quality"])
+
+
+def normalize_photo(data, jpeg_quality=85):
+    """Prepare an uploaded photo for OCR.
+
+    Applies the EXIF orientation, downsamples to an OCR-appropriate size,
+    converts to grayscale and recompresses as JPEG. Returns (image, jpeg_bytes).
+    """
+    image = Image.open(io.BytesIO(data))
+    width, height = image.size
+    scale = min(
+        1.0,
+        settings.OCR_PHOTO_MAX_SIDE / max(width, height),
+        (settings.OCR_MAX_PIXELS / (width * height)) ** 0.5,
+    )
+    target_side = max(width, height) * scale
+    # Let the JPEG decoder downscale while decoding instead of resizing a full-size bitmap.
+    image.draft("L", (int(width * scale), int(height * scale)))
+    image = ImageOps.exif_transpose(image).convert("L")
+    ratio = target_side / max(image.size)
+    if ratio < 1.0:
+        image = image.resize((max(1, round(image.width * ratio)), max(1, round(image.height * ratio))), Image.LANCZOS)
+    return image, _encode_image(image, "jpeg", jpeg_quality)
+
+
+def iter_document_pages(
+    file_path, file_type, mode="hybrid", render_options=None, skip_pages=None, pages=None, regions=None
+):
+    if file_type == "pdf":
+        min_chars = settings.OCR_TEXT_LAYER_MIN_CHARS if mode == "hybrid" else None
+        yield from iter_pdf_pages(file_path, min_chars, render_options, skip_pages, pages, regions)
+        return
+    if (skip_pages and 1 in skip_pages) or (pages is not None and 1 not in pages):
+        return
+    with open(file_path, "rb") as file_obj:
+        data = file_obj.read()
+    region = _region_for(regions, 1)
+    jpeg_quality = (render_options or DEFAULT_RENDER_OPTIONS)["jpeg_quality"]
+    try:
+        image, normalized = normalize_photo(data, jpeg_quality)
+    except Exception as exc:
+        if region:
+            raise
+        logger.warning("Photo normalization failed, sending the original upload: %s", exc)
+        yield OCRPage(1, data=data)
+        return
+    if region:
+        # Only the cropped pixels are encoded and sent.
+        width, height = image.size
+        image = image.crop((
+            int(region[0] * width), int(region[1] * height), int(region[2] * width), int(region[3] * height),
+        ))
+        yield OCRPage(1, image=image, image_format="jpeg", jpeg_quality=jpeg_quality)
+        return
+    if len(normalized) >= len(data):
+        # Already compact (e.g. a screenshot): recompressing would only cost quality.
+        yield OCRPage(1, image=image, data=data)
+        return
+    logger.info(
+        "Normalized photo %s: %d -> %d bytes (%d saved)",
+        file_path, len(data), len(normalized), len(data) - len(normalized),
+    )
+    yield OCRPage(1, image=image, data=normalized)
 
 
 def _normalize_tesseract_language(language_hint):
@@ -57,31 +347,409 @@ def run_free_ocr_from_image(image, language_hint=None):
         return ""
 
 
-def run_free_ocr_from_base64(base64_image, language_hint=None):
+def run_free_ocr_with_confidence(image, language_hint=None):
+    """Local OCR returning (text, mean word confidence 0-100, or None if unknown)."""
     try:
-        raw = base64.b64decode(base64_image)
-        image = Image.open(io.BytesIO(raw))
+        import pytesseract  # noqa: F401
+    except ImportError:
+        logger.warning("pytesseract is not installed; free OCR fallback skipped.")
+        return "", None
+    try:
+        return tesseract_pool.read_page(image, _normalize_tesseract_language(language_hint))
     except Exception as exc:
-        logger.warning("Free OCR fallback decode failed: %s", exc)
-        return ""
-    return run_free_ocr_from_image(image, language_hint)
+        logger.warning("Free OCR fallback failed: %s", exc)
+        return "", None
 
 
-def run_google_vision_ocr(file_path, file_type, language_hint=None):
-    if file_type == "pdf":
-        texts = []
-        for base64_img in pdf_to_images_base64(file_path):
-            try:
-                text = request_google_vision_text(base64_img, language_hint)
-            except Exception as exc:
-                logger.warning("Google Vision OCR failed, using free OCR fallback: %s", exc)
-                text = run_free_ocr_from_base64(base64_img, language_hint)
-            if text:
-                texts.append(text)
-        return "\n\n".join(texts).strip()
-    base64_img = image_file_to_base64(file_path)
+def run_free_ocr_many(images, language_hint=None):
+    """Local OCR of several images, on the warm process pool when it is selected.
+
+    Returns one (text, confidence) tuple per image, in order.
+    """
+    if settings.OCR_LOCAL_ENGINE == "tesseract_pool" and images:
+        return tesseract_pool.recognize_many(images, _normalize_tesseract_language(language_hint))
+    return [run_free_ocr_with_confidence(image, language_hint) for image in images]
+
+
+@lru_cache(maxsize=1)
+def local_engine_available():
+    try:
+        import tesserocr  # noqa: F401
+        return True
+    except ImportError:
+        pass
+    try:
+        import pytesseract
+
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def _local_first():
+    return settings.OCR_STRATEGY == "local_first" and local_engine_available()
+
+
+def is_confident(text, confidence):
+    """A local read is good enough to skip Vision."""
+    return (
+        confidence is not None
+        and confidence >= settings.OCR_LOCAL_MIN_CONFIDENCE
+        and len(text.split()) >= settings.OCR_LOCAL_MIN_WORDS
+    )
+
+
+def _resolve_concurrency(concurrency):
+    try:
+        concurrency = int(concurrency or settings.OCR_PAGE_CONCURRENCY)
+    except (TypeError, ValueError):
+        concurrency = settings.OCR_PAGE_CONCURRENCY
+    return max(1, min(concurrency, settings.OCR_MAX_CONCURRENCY))
+
+
+def _page_result(page_number, text, engine, elapsed_ms=0, batch_size=0, cached=False, confidence=None):
+    return {
+        "page": page_number,
+        "text": text,
+        "engine": engine,
+        "elapsed_ms": elapsed_ms,
+        "batch_size": batch_size,
+        "cached": cached,
+        "confidence": confidence,
+    }
+
+
+def iter_vision_batches(pages, max_bytes=None):
+    """Group OCRPages into batches under the Vision request budget.
+
+    Payload size only counts when max_bytes is given, so pages that will never
+    reach Vision are not encoded just to be measured.
+    """
+    current = []
+    current_bytes = 0
+    for page in pages:
+        size = len(page.payload) if max_bytes else 0
+        if current and (
+            len(current) >= settings.OCR_VISION_BATCH_SIZE
+            or (max_bytes and current_bytes + size > max_bytes)
+        ):
+            yield current
+            current = []
+            current_bytes = 0
+        current.append(page)
+        current_bytes += size
+    if current:
+        yield current
+
+
+def _request_batch_texts(batch, language_hint, api_key):
+    if not api_key:
+        return [ValueError("GOOGLE_VISION_API_KEY is missing")] * len(batch)
     try:
-        return request_google_vision_text(base64_img, language_hint)
+        return request_google_vision_batch([page.payload for page in batch], language_hint, api_key=api_key)
+    except vision_breaker.VisionCircuitOpen as exc:
+        return [exc] * len(batch)
     except Exception as exc:
-        logger.warning("Google Vision OCR failed, using free OCR fallback: %s", exc)
-        return run_free_ocr_from_base64(base64_img, language_hint)
+        logger.warning("Google Vision batch of %s pages failed: %s", len(batch), exc)
+        return [exc] * len(batch)
+
+
+def _ocr_batch(batch, language_hint=None, api_key=None, fallback_texts=None, local_texts=None):
+    """Vision for the batch; pages it fails on fall back to the local engine.
+
+    fallback_texts (cached) and local_texts (already read this run) map page
+    numbers to (text, confidence), so the local engine only runs for pages
+    that have neither.
+    """
+    started = time.monotonic()
+    with _ocr_slots:
+        results = _request_batch_texts(batch, language_hint, api_key)
+        # Retry only pages Vision itself rejected. A failure of the whole request
+        # (read timeout, HTTP error) is not sent again: http_client already retried
+        # 429/5xx, and a timed-out request may still be billed.
+        retry = [index for index, result in enumerate(results) if isinstance(result, VisionImageError)]
+        if retry:
+            retried = _request_batch_texts([batch[index] for index in retry], language_hint, api_key)
+            for index, result in zip(retry, retried):
+                results[index] = result
+    batch_ms = int((time.monotonic() - started) * 1000)
+
+    fallback_texts = fallback_texts or {}
+    local_texts = dict(local_texts or {})
+    failed = [
+        page for page, result in zip(batch, results)
+        if isinstance(result, Exception) and page.number not in fallback_texts and page.number not in local_texts
+    ]
+    fallback_started = time.monotonic()
+    for page, read in zip(failed, run_free_ocr_many([page.pixels() for page in failed], language_hint)):
+        local_texts[page.number] = read
+    fallback_ms = int((time.monotonic() - fallback_started) * 1000)
+    fresh = {page.number for page in failed}
+
+    pages = []
+    for page, result in zip(batch, results):
+        engine = "google_vision"
+        elapsed_ms = batch_ms
+        cached = False
+        confidence = None
+        if isinstance(result, Exception):
+            logger.warning("Google Vision OCR failed on page %s, using free OCR fallback: %s", page.number, result)
+            engine = "tesseract"
+            if page.number in local_texts:
+                result, confidence = local_texts[page.number]
+                if page.number in fresh:
+                    elapsed_ms += fallback_ms
+            else:
+                result, confidence = fallback_texts[page.number]
+                cached = True
+        page.release()
+        logger.info("OCR page %s done with %s in %d ms", page.number, engine, elapsed_ms)
+        pages.append(_page_result(page.number, result, engine, elapsed_ms, len(batch), cached, confidence))
+    return pages
+
+
+def _local_first_batch(batch, language_hint=None, api_key=None, fallback_texts=None):
+    """Read the batch locally and escalate only low-confidence pages to Vision."""
+    fallback_texts = fallback_texts or {}
+    # Pages with a cached (unconfident) local read go straight to Vision.
+    unread = [page for page in batch if page.number not in fallback_texts]
+    started = time.monotonic()
+    reads = dict(zip([page.number for page in unread], run_free_ocr_many([page.pixels() for page in unread], language_hint)))
+    local_ms = int((time.monotonic() - started) * 1000)
+
+    pages = []
+    escalate = []
+    for page in batch:
+        text, confidence = reads.get(page.number, fallback_texts.get(page.number))
+        if page.number in reads and is_confident(text, confidence):
+            page.release()
+            logger.info("OCR page %s done with tesseract (confidence %s) in %d ms", page.number, confidence, local_ms)
+            pages.append(_page_result(page.number, text, "tesseract", local_ms, len(batch), confidence=confidence))
+        else:
+            escalate.append(page)
+    if escalate:
+        logger.info("Escalating %s of %s pages to Google Vision", len(escalate), len(batch))
+        local_texts = {page.number: reads[page.number] for page in escalate if page.number in reads}
+        # Scanned pages escalate together, so split them to stay under the Vision request budget.
+        max_bytes = settings.OCR_VISION_BATCH_BYTES if api_key else None
+        for vision_batch in iter_vision_batches(escalate, max_bytes):
+            for result in _ocr_batch(vision_batch, language_hint, api_key, fallback_texts, local_texts):
+                if result["page"] in reads:
+                    result["elapsed_ms"] += local_ms
+                pages.append(result)
+    return pages
+
+
+def _cache_keys(pages, language_hint):
+    keys = {}
+    for page in pages:
+        digest = page.raster_digest()
+        keys[page.number] = {engine: ocr_cache.page_cache_key(digest, engine, language_hint) for engine in OCR_ENGINES}
+    return keys
+
+
+def _store_in_cache(results, keys, language_hint):
+    entries = []
+    for page in results:
+        if page["cached"] or (page["engine"] == "tesseract" and not page["text"]):
+            continue
+        entries.append(
+            (keys[page["page"]][page["engine"]], page["engine"], language_hint, page["text"], page["confidence"])
+        )
+    ocr_cache.store(entries)
+
+
+def _split_cached(batch, keys, local_first=False):
+    cached = ocr_cache.lookup([key for page in batch for key in keys[page.number].values()])
+    hits = []
+    pending = []
+    fallback_texts = {}
+    for page in batch:
+        vision_key = keys[page.number]["google_vision"]
+        tesseract_key = keys[page.number]["tesseract"]
+        if vision_key in cached:
+            hits.append(_page_result(page.number, cached[vision_key][0], "google_vision", cached=True))
+            page.release()
+            continue
+        if tesseract_key in cached:
+            text, confidence = cached[tesseract_key]
+            if local_first and is_confident(text, confidence):
+                hits.append(_page_result(page.number, text, "tesseract", cached=True, confidence=confidence))
+                page.release()
+                continue
+            fallback_texts[page.number] = (text, confidence)
+        pending.append(page)
+    return hits, pending, fallback_texts
+
+
+def _ocr_candidates(pages, add_results):
+    """Pass through pages that need OCR; answer text-layer pages directly."""
+    for page in pages:
+        if not page.needs_ocr:
+            add_results([_page_result(page.number, page.text_layer, "text_layer")])
+            continue
+        yield page
+
+
+def ink_tiles(image):
+    """Number of tiles of a page image that carry ink.
+
+    Dark pixels are found at render resolution, so a single line of small
+    text still counts, then pooled into tiles about 1/256 of the page width;
+    a tile is inked when at least a tenth of it is dark. Scattered scan noise
+    rarely fills a tile. A 5% margin is trimmed so scanner edges and punch
+    holes do not count as content.
+    """
+    gray = ImageOps.grayscale(image)
+    width, height = gray.size
+    inner = gray.crop((width // 20, height // 20, width - width // 20, height - height // 20))
+    ink = inner.point(lambda value: 255 if value < 160 else 0)
+    tiles = ink.reduce(max(1, inner.width // 256))
+    return sum(tiles.histogram()[26:])
+
+
+def _screen_pages(pages, add_results, duplicates):
+    """Answer blank pages and hold back exact duplicates before they reach an OCR engine.
+
+    A duplicate is released unread and recorded in `duplicates` as
+    {original page number: [duplicate page numbers]}, so its result can be
+    made from the original's once that is known.
+    """
+    seen = {}
+    for page in pages:
+        if not (settings.OCR_SKIP_BLANK_PAGES or settings.OCR_DEDUPE_PAGES):
+            yield page
+            continue
+        if settings.OCR_SKIP_BLANK_PAGES and ink_tiles(page.pixels()) < settings.OCR_BLANK_MIN_INK_TILES:
+            page.release()
+            add_results([_page_result(page.number, "", "blank")])
+            continue
+        if settings.OCR_DEDUPE_PAGES:
+            # Only identical pixels: pages that differ in one filled-in value must each be read.
+            digest = page.raster_digest()
+            if digest in seen:
+                page.release()
+                duplicates.setdefault(seen[digest], []).append(page.number)
+                continue
+            seen[digest] = page.number
+        yield page
+
+
+def skipped_pages(pages):
+    """Summary of pages the pre-pass answered without OCR, for result metadata."""
+    return {
+        "blank": [page["page"] for page in pages if page["engine"] == "blank"],
+        "duplicates": {str(page["page"]): page["duplicate_of"] for page in pages if page["engine"] == "duplicate"},
+    }
+
+
+def run_ocr_pages(
+    file_path,
+    file_type,
+    language_hint=None,
+    concurrency=None,
+    mode="hybrid",
+    on_page=None,
+    skip_pages=None,
+    pages=None,
+    regions=None,
+):
+    """OCR a document and return one result dict per page, in page order.
+
+    In "hybrid" mode PDF pages with a usable text layer skip OCR entirely;
+    "ocr" mode rasterizes every page. Pages are rendered lazily and at most
+    `concurrency` batches are in flight, so only those pages' pixels are
+    held in memory at any time. `on_page` is called on the calling thread
+    with each page result as it completes (not necessarily in page order).
+    Pages in `skip_pages` are neither rendered nor returned; `pages` and
+    `regions` (see parse_page_ranges / parse_regions) limit OCR to those pages
+    and crop boxes.
+    """
+    # Cache lookups and the key are resolved on this thread: workers should not each hit the database.
+    api_key = get_google_vision_key()
+    local_first = _local_first()
+    ocr_batch = _local_first_batch if local_first else _ocr_batch
+    workers = _resolve_concurrency(concurrency)
+    results = []
+    in_flight = deque()
+
+    duplicates = {}
+
+    def add_results(pages):
+        copies = []
+        for page in pages:
+            # Pages held back as duplicates of this one get its text.
+            for number in duplicates.pop(page["page"], ()):
+                copy = _page_result(number, page["text"], "duplicate", confidence=page["confidence"])
+                copy["duplicate_of"] = page["page"]
+                copies.append(copy)
+        pages = list(pages) + copies
+        results.extend(pages)
+        if on_page:
+            for page in pages:
+                on_page(page)
+
+    def collect(keys, future):
+        processed = future.result()
+        _store_in_cache(processed, keys, language_hint)
+        add_results(processed)
+
+    page_keys = {}
+    page_fallbacks = {}
+
+    def answer_cached(group):
+        keys = _cache_keys(group, language_hint)
+        cached_pages, pending, fallback_texts = _split_cached(group, keys, local_first)
+        add_results(cached_pages)
+        page_fallbacks.update(fallback_texts)
+        for page in pending:
+            page_keys[page.number] = keys[page.number]
+        return pending
+
+    def uncached(pages):
+        # Cache hits are answered here, before Vision batching encodes pages to measure them.
+        group = []
+        for page in pages:
+            group.append(page)
+            if len(group) >= settings.OCR_VISION_BATCH_SIZE:
+                yield from answer_cached(group)
+                group = []
+        if group:
+            yield from answer_cached(group)
+
+    document_pages = iter_document_pages(file_path, file_type, mode, get_render_options(), skip_pages, pages, regions)
+    candidates = _screen_pages(_ocr_candidates(document_pages, add_results), add_results, duplicates)
+    # Local-first batches only encode the pages they escalate, so sizes are not known up front.
+    max_bytes = settings.OCR_VISION_BATCH_BYTES if api_key and not local_first else None
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch in iter_vision_batches(uncached(candidates), max_bytes):
+            keys = {page.number: page_keys.pop(page.number) for page in batch}
+            fallback_texts = {
+                page.number: page_fallbacks.pop(page.number) for page in batch if page.number in page_fallbacks
+            }
+            in_flight.append((keys, executor.submit(ocr_batch, batch, language_hint, api_key, fallback_texts)))
+            # Drop the local reference so pixels are freed as soon as the batch finishes.
+            batch = None
+            while len(in_flight) >= workers:
+                collect(*in_flight.popleft())
+        while in_flight:
+            collect(*in_flight.popleft())
+
+    ocr_pages = [page for page in results if page["engine"] not in PREPASS_ENGINES]
+    hits = sum(1 for page in ocr_pages if page["cached"])
+    ocr_cache.record(hits=hits, misses=len(ocr_pages) - hits)
+    results.sort(key=lambda page: page["page"])
+    return results
+
+
+def page_timings(pages):
+    return [{key: value for key, value in page.items() if key != "text"} for page in pages]
+
+
+def join_page_texts(pages):
+    return "\n\n".join(page["text"] for page in pages if page["text"]).strip()
+
+
+def run_google_vision_ocr(file_path, file_type, language_hint=None, concurrency=None, mode="hybrid"):
+    return join_page_texts(run_ocr_pages(file_path, file_type, language_hint, concurrency, mode))
@@ -1,39 +1,268 @@
+import json
+import logging
+import time
 import requests
 from django.conf import settings
 from core.models import SiteSettings
+from . import glossary, http_client, translation_memory, translation_routing
 
+logger = logging.getLogger(__name__)
 
-def translate_text(text, source, target, model=None):
+SYSTEM_PROMPT = "You are a professional translator. Translate the input text exactly and only output the translated text."
+BATCH_SYSTEM_PROMPT = (
+    "You are a professional translator. The input is a JSON object of form field values. "
+    "Translate every value and return a JSON object with exactly the same keys, "
+    "whose values are the translations. Output only the JSON object."
+)
+
+
+def _get_api_key():
     site_settings = SiteSettings.objects.first()
     api_key = site_settings.openai_api_key if site_settings and site_settings.openai_api_key else settings.OPENAI_API_KEY
     if not api_key:
         raise ValueError("OPENAI_API_KEY is missing")
+    return api_key
+
+
+RESPONSES_URL = "https://api.openai.com/v1/responses"
+
+
+def _headers(api_key):
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}",
+    }
+
+
+def _input_chars(payload):
+    return sum(len(message["content"]) for message in payload["input"])
+
+
+def _post_response(api_key, payload, route):
+    started = time.monotonic()
+    try:
+        response = http_client.post(
+            "openai",
+            RESPONSES_URL,
+            headers=_headers(api_key),
+            json=payload,
+            timeout=(settings.HTTP_CONNECT_TIMEOUT, route.timeout),
+        )
+        response.raise_for_status()
+        data = response.json()
+    except (requests.RequestException, ValueError):
+        translation_routing.record_call(route, started, _input_chars(payload), ok=False)
+        raise
+    translation_routing.record_call(route, started, _input_chars(payload), usage=data.get("usage"))
+    return data.get("output", [{}])[0].get("content", [{}])[0].get("text", data.get("output_text", ""))
+
+
+def _memory_model(model, constraints):
+    # Translations made under glossary constraints are remembered per glossary state.
+    fingerprint = glossary.constraints_fingerprint(constraints)
+    return f"{model}+glossary:{fingerprint}" if fingerprint else model
+
+
+def translate_text(text, source, target, model=None):
+    api_key = _get_api_key()
     if not text.strip():
         return ""
+    term = glossary.exact_match(text, source, target)
+    if term is not None:
+        return term
 
-    model = model or settings.OPENAI_MODEL
-    system_prompt = (
-        "You are a professional translator. Translate the input text exactly and only output the translated text."
-    )
+    route = translation_routing.choose_route(text, model)
+    constraints = glossary.prompt_constraints(glossary.find_terms(text, source, target))
+    memory_model = _memory_model(route.model, constraints)
+    remembered = translation_memory.lookup(text, source, target, memory_model)
+    if remembered is not None:
+        return remembered
+    translated = _request_translation(text, source, target, route, api_key, constraints)
+    translation_memory.store(text, source, target, memory_model, translated)
+    return translated
 
-    response = requests.post(
-        "https://api.openai.com/v1/responses",
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}",
-        },
-        json={
-            "model": model,
+
+def _translation_payload(text, source, target, model, constraints=""):
+    return {
+        "model": model,
+        "input": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": f"Source language: {source}\nTarget language: {target}\n\n{constraints}Text:\n{text}",
+            },
+        ],
+    }
+
+
+def _request_translation(text, source, target, route, api_key, constraints=""):
+    return _post_response(api_key, _translation_payload(text, source, target, route.model, constraints), route)
+
+
+def _stream_response(api_key, payload, route):
+    """Yield the output text deltas of a streamed Responses API call."""
+    started = time.monotonic()
+    ttfb = None
+    usage = None
+    ok = False
+    try:
+        response = http_client.post(
+            "openai",
+            RESPONSES_URL,
+            headers=_headers(api_key),
+            json={**payload, "stream": True},
+            stream=True,
+            timeout=(settings.HTTP_CONNECT_TIMEOUT, route.timeout),
+        )
+        with response:
+            response.raise_for_status()
+            # text/event-stream has no charset, requests would fall back to latin-1.
+            response.encoding = "utf-8"
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    event = json.loads(data)
+                except ValueError:
+                    continue
+                event_type = event.get("type")
+                if event_type == "response.output_text.delta":
+                    if event.get("delta"):
+                        if ttfb is None:
+                            ttfb = time.monotonic() - started
+                        yield event["delta"]
+                elif event_type in ("response.completed", "response.incomplete"):
+                    usage = event.get("response", {}).get("usage")
+                    break
+                elif event_type in ("response.failed", "error"):
+                    error = event.get("response", {}).get("error") or event.get("error") or event
+                    raise requests.RequestException(f"OpenAI stream failed: {error}")
+        ok = True
+    finally:
+        translation_routing.record_call(
+            route, started, _input_chars(payload), ok=ok, usage=usage, ttfb=ttfb, streamed=True
+        )
+
+
+def stream_translation(text, source, target, model=None):
+    """Like translate_text, but yields the translation piece by piece as the model writes it."""
+    api_key = _get_api_key()
+    if not text.strip():
+        return
+    term = glossary.exact_match(text, source, target)
+    if term is not None:
+        yield term
+        return
+
+    route = translation_routing.choose_route(text, model)
+    constraints = glossary.prompt_constraints(glossary.find_terms(text, source, target))
+    memory_model = _memory_model(route.model, constraints)
+    remembered = translation_memory.lookup(text, source, target, memory_model)
+    if remembered is not None:
+        yield remembered
+        return
+    parts = []
+    payload = _translation_payload(text, source, target, route.model, constraints)
+    for delta in _stream_response(api_key, payload, route):
+        parts.append(delta)
+        yield delta
+    translation_memory.store(text, source, target, memory_model, "".join(parts))
+
+
+def _parse_json_object(text):
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("{"):]
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def _request_batch_translation(values, source, target, route, api_key, constraints=""):
+    """Translate {key: text} in one structured request; returns only the keys that came back valid."""
+    output = _post_response(
+        api_key,
+        {
+            "model": route.model,
             "input": [
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
                 {
                     "role": "user",
-                    "content": f"Source language: {source}\nTarget language: {target}\n\nText:\n{text}",
+                    "content": (
+                        f"Source language: {source}\nTarget language: {target}\n\n{constraints}"
+                        f"{json.dumps(values, ensure_ascii=False)}"
+                    ),
                 },
             ],
+            "text": {"format": {"type": "json_object"}},
         },
-        timeout=60,
+        route,
     )
-    response.raise_for_status()
-    data = response.json()
-    return data.get("output", [{}])[0].get("content", [{}])[0].get("text", data.get("output_text", ""))
+    parsed = _parse_json_object(output)
+    return {
+        key: parsed[key].strip()
+        for key in values
+        if isinstance(parsed.get(key), str) and parsed[key].strip()
+    }
+
+
+def translate_fields(values, source, target, model=None):
+    """Translate a {field key: text} mapping with one provider round trip.
+
+    Glossary terms and remembered translations are answered locally, the
+    rest go out as a single JSON request (with the glossary terms they use),
+    and only keys missing from (or invalid in) the reply are translated again
+    one by one.
+    """
+    api_key = _get_api_key()
+    # Field values go out as one JSON request, so they are routed by its combined size.
+    route = translation_routing.choose_route(
+        json.dumps({key: text for key, text in values.items() if text.strip()}, ensure_ascii=False), model
+    )
+    translated = {}
+    pending = {}
+    terms = {}
+    for key, text in values.items():
+        if not text.strip():
+            translated[key] = ""
+            continue
+        term = glossary.exact_match(text, source, target)
+        if term is not None:
+            translated[key] = term
+            continue
+        terms[key] = glossary.find_terms(text, source, target)
+        memory_model = _memory_model(route.model, glossary.prompt_constraints(terms[key]))
+        remembered = translation_memory.lookup(text, source, target, memory_model)
+        if remembered is not None:
+            translated[key] = remembered
+        else:
+            pending[key] = text
+
+    if len(pending) > 1:
+        used_terms = list(dict.fromkeys(term for key in pending for term in terms[key]))
+        try:
+            batch = _request_batch_translation(
+                pending, source, target, route, api_key, glossary.prompt_constraints(used_terms)
+            )
+        except (requests.RequestException, ValueError) as exc:
+            # ValueError: the provider answered with a body that is not JSON.
+            logger.warning("Batch translation of %s fields failed, translating one by one: %s", len(pending), exc)
+            batch = {}
+        for key, text in batch.items():
+            memory_model = _memory_model(route.model, glossary.prompt_constraints(terms[key]))
+            translation_memory.store(pending[key], source, target, memory_model, text)
+        translated.update(batch)
+        missing = [key for key in pending if key not in batch]
+        if missing:
+            logger.info("Batch translation returned %s of %s fields", len(batch), len(pending))
+        pending = {key: pending[key] for key in missing}
+
+    for key, text in pending.items():
+        translated[key] = translate_text(text, source, target, route.model)
+    return {key: translated[key] for key in values}
@@ -0,0 +1,108 @@
+"""Streaming text extraction for uploaded spreadsheets.
+
+.xlsx files are read with openpyxl in read-only mode, which parses rows from
+the sheet XML as they are iterated instead of building every cell object.
+Legacy .xls files are opened with xlrd on_demand, so only the sheet being
+read is loaded and it is unloaded before the next one.
+"""
+import io
+import logging
+from django.conf import settings
+from openpyxl import load_workbook
+import xlrd
+
+logger = logging.getLogger(__name__)
+
+
+def parse_sheet_selection(value):
+    """Parse "Sheet1,2" or ["Sheet1", 2] into a list; empty selects every sheet."""
+    if value in (None, "", []):
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        raise ValueError("sheets must be a list of sheet names or numbers.")
+    return [item.strip() if isinstance(item, str) else item for item in value if str(item).strip()]
+
+
+def _selected(names, sheets):
+    """Sheet names to read, in workbook order; sheets are names or 1-based numbers."""
+    if not sheets:
+        return list(names)
+    wanted = set()
+    for sheet in sheets:
+        if isinstance(sheet, int) or str(sheet).isdigit():
+            index = int(sheet) - 1
+            if 0 <= index < len(names):
+                wanted.add(names[index])
+        elif sheet in names:
+            wanted.add(sheet)
+    return [name for name in names if name in wanted]
+
+
+def _row_text(values):
+    return " ".join(str(value) for value in values if value not in ("", None))
+
+
+def _iter_xlsx_rows(workbook, sheets):
+    for name in _selected(workbook.sheetnames, sheets):
+        for row in workbook[name].iter_rows(values_only=True):
+            yield name, _row_text(row)
+
+
+def _iter_xls_rows(book, sheets):
+    names = book.sheet_names()
+    for name in _selected(names, sheets):
+        sheet = book.sheet_by_name(name)
+        for row_idx in range(sheet.nrows):
+            yield name, _row_text(sheet.row_values(row_idx))
+        book.unload_sheet(name)
+
+
+def iter_spreadsheet_rows(file_path, sheets=None):
+    """Yield (sheet name, row text) for every row, streaming from the file."""
+    try:
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+    except Exception:
+        book = xlrd.open_workbook(file_path, on_demand=True)
+        try:
+            yield from _iter_xls_rows(book, sheets)
+        finally:
+            book.release_resources()
+        return
+    try:
+        yield from _iter_xlsx_rows(workbook, sheets)
+    finally:
+        workbook.close()
+
+
+def extract_spreadsheet_text(file_path, sheets=None, max_rows=None, max_bytes=None):
+    """Return (text, summary) for a spreadsheet, stopping at the row/byte caps.
+
+    Non-empty rows become lines of space-separated cell values. The summary
+    reports the sheets read, rows and bytes kept, and whether a cap was hit.
+    """
+    max_rows = max_rows or settings.SPREADSHEET_MAX_ROWS
+    max_bytes = max_bytes or settings.SPREADSHEET_MAX_BYTES
+    output = io.StringIO()
+    rows = 0
+    size = 0
+    sheets_read = []
+    truncated = False
+    for sheet_name, row_text in iter_spreadsheet_rows(file_path, sheets):
+        if not sheets_read or sheets_read[-1] != sheet_name:
+            sheets_read.append(sheet_name)
+        if not row_text.strip():
+            continue
+        line_bytes = len(row_text.encode("utf-8")) + 1
+        if rows >= max_rows or size + line_bytes > max_bytes:
+            truncated = True
+            break
+        if rows:
+            output.write("\n")
+        output.write(row_text)
+        rows += 1
+        size += line_bytes
+    if truncated:
+        logger.info("Spreadsheet %s truncated at %s rows / %s bytes", file_path, rows, size)
+    return output.getvalue(), {"sheets": sheets_read, "rows": rows, "bytes": size, "truncated": truncated}
@@ -0,0 +1,152 @@
+"""Warm process pool for local (tesseract) OCR.
+
+Each worker process caps OpenMP threads so N workers use N cores instead of
+fighting over all of them. When the optional `tesserocr` binding is installed,
+workers keep one initialized engine per language, so traineddata is loaded
+once per process instead of once per page; otherwise they fall back to
+pytesseract, which still spreads pages across cores.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Per-process engines, filled by _init_worker in pool workers.
+_engines = {}
+
+
+def _init_worker(languages, omp_threads):
+    os.environ["OMP_THREAD_LIMIT"] = str(omp_threads)
+    try:
+        import tesserocr
+    except ImportError:
+        return
+    for lang in languages:
+        try:
+            _engines[lang] = tesserocr.PyTessBaseAPI(lang=lang)
+        except Exception as exc:
+            logger.warning("Could not preload tesseract language %s: %s", lang, exc)
+
+
+def _recognize(image, lang):
+    try:
+        return _recognize_with_engine(image, lang)
+    except Exception as exc:
+        # Some tesseract exceptions cannot be unpickled in the parent and would
+        # break the whole pool; send a plain error back instead.
+        raise RuntimeError(f"{type(exc).__name__}: {exc}") from None
+
+
+def _recognize_with_engine(image, lang):
+    engine = _engines.get(lang)
+    if engine is None:
+        try:
+            import tesserocr
+
+            engine = _engines[lang] = tesserocr.PyTessBaseAPI(lang=lang)
+        except Exception:
+            engine = None
+    return read_page(image, lang, engine)
+
+
+def _mean(values):
+    return round(sum(values) / len(values), 1) if values else None
+
+
+def read_page(image, lang, engine=None):
+    """OCR one image; returns (text, mean word confidence 0-100 or None)."""
+    if engine is not None:
+        engine.SetImage(image)
+        return engine.GetUTF8Text().strip(), _mean([conf for conf in engine.AllWordConfidences() if conf >= 0])
+    import pytesseract
+
+    # image_to_data gives per-word confidences; the text is rebuilt from its
+    # line/paragraph numbering so one tesseract run yields both.
+    data = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
+    paragraphs = {}
+    confidences = []
+    for index, word in enumerate(data["text"]):
+        word = (word or "").strip()
+        if not word:
+            continue
+        paragraph = (data["block_num"][index], data["par_num"][index])
+        paragraphs.setdefault(paragraph, {}).setdefault(data["line_num"][index], []).append(word)
+        confidence = float(data["conf"][index])
+        if confidence >= 0:
+            confidences.append(confidence)
+    text = "\n\n".join(
+        "\n".join(" ".join(words) for words in lines.values()) for lines in paragraphs.values()
+    )
+    return text, _mean(confidences)
+
+
+def pool_size():
+    return settings.OCR_TESSERACT_POOL_SIZE or max(1, (os.cpu_count() or 2) - 1)
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            languages = [lang for lang in settings.OCR_TESSERACT_LANGUAGES.split(",") if lang]
+            # spawn: forking a threaded gunicorn/worker process is not safe.
+            _pool = ProcessPoolExecutor(
+                max_workers=pool_size(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(languages, settings.OCR_TESSERACT_OMP_THREADS),
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        broken, _pool = _pool, None
+    if broken is not None:
+        broken.shutdown(wait=False, cancel_futures=True)
+
+
+def recognize_many(images, lang):
+    """OCR images on the pool; returns (text, confidence) in input order, ("", None) for failures."""
+    try:
+        futures = [get_pool().submit(_recognize, image, lang) for image in images]
+    except Exception as exc:
+        logger.warning("Tesseract pool unavailable: %s", exc)
+        return [("", None)] * len(images)
+    reads = []
+    for future in futures:
+        try:
+            reads.append(future.result())
+        except BrokenProcessPool as exc:
+            logger.warning("Tesseract pool worker died, restarting pool: %s", exc)
+            _reset_pool()
+            reads.append(("", None))
+        except Exception as exc:
+            logger.warning("Tesseract pool OCR failed: %s", exc)
+            reads.append(("", None))
+    return reads
+
+
+def status():
+    try:
+        import tesserocr  # noqa: F401
+        preloaded = True
+    except ImportError:
+        preloaded = False
+    return {
+        "enabled": settings.OCR_LOCAL_ENGINE == "tesseract_pool",
+        "size": pool_size(),
+        "languages": settings.OCR_TESSERACT_LANGUAGES,
+        "omp_threads": settings.OCR_TESSERACT_OMP_THREADS,
+        "preloaded_models": preloaded,
+        "started": _pool is not None,
+    }
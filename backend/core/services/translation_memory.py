@@ -0,0 +1,212 @@
+"""Translation memory: reuse earlier translations of the same text.
+
+Entries are keyed on the normalized source text, the language pair and the
+model. A small in-process LRU answers repeats without a query; the
+TranslationMemoryEntry table shares translations across processes and
+restarts. Both respect TRANSLATION_MEMORY_TTL_DAYS.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import F, Sum
+from django.utils import timezone
+from core.models import TranslationMemoryEntry
+
+logger = logging.getLogger(__name__)
+
+HITS_KEY = "translation_memory:hits"
+LRU_HITS_KEY = "translation_memory:lru_hits"
+MISSES_KEY = "translation_memory:misses"
+EVICT_KEY = "translation_memory:evicted"
+
+COUNTER_FLUSH_SECONDS = 10
+
+_lru = OrderedDict()
+_lru_lock = threading.Lock()
+# Hit/miss counts are kept per process and added to the shared cache every
+# COUNTER_FLUSH_SECONDS, so an LRU hit does not write to the cache.
+_counts = {HITS_KEY: 0, LRU_HITS_KEY: 0, MISSES_KEY: 0}
+_counts_lock = threading.Lock()
+_flushed_at = {"value": time.monotonic()}
+
+
+def normalize(text):
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def memory_key(text, source, target, model):
+    return hashlib.sha256(f"{source}|{target}|{model}|{normalize(text)}".encode("utf-8")).hexdigest()
+
+
+def _cacheable(text):
+    return settings.TRANSLATION_MEMORY_ENABLED and 0 < len(text) <= settings.TRANSLATION_MEMORY_MAX_CHARS
+
+
+def _ttl_seconds():
+    return settings.TRANSLATION_MEMORY_TTL_DAYS * 86400
+
+
+def _lru_get(key):
+    with _lru_lock:
+        item = _lru.get(key)
+        if item is None:
+            return None
+        translated, stored_at = item
+        if time.time() - stored_at > _ttl_seconds():
+            del _lru[key]
+            return None
+        _lru.move_to_end(key)
+        return translated
+
+
+def _lru_put(key, translated, stored_at=None):
+    with _lru_lock:
+        _lru[key] = (translated, stored_at or time.time())
+        _lru.move_to_end(key)
+        while len(_lru) > settings.TRANSLATION_MEMORY_LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+def _incr(*keys):
+    with _counts_lock:
+        for key in keys:
+            _counts[key] += 1
+        due = time.monotonic() - _flushed_at["value"] >= COUNTER_FLUSH_SECONDS
+    if due:
+        flush_counters()
+
+
+def flush_counters():
+    """Add this process's pending hit/miss counts to the shared cache."""
+    with _counts_lock:
+        pending = {key: amount for key, amount in _counts.items() if amount}
+        for key in _counts:
+            _counts[key] = 0
+        _flushed_at["value"] = time.monotonic()
+    for key, amount in pending.items():
+        try:
+            cache.add(key, 0, timeout=None)
+            try:
+                cache.incr(key, amount)
+            except ValueError:
+                # Evicted between add and incr (cache culling or clear).
+                cache.set(key, amount, timeout=None)
+        except Exception as exc:
+            # Counters are statistics only: a cache outage must not fail the translation.
+            logger.warning("Could not update translation memory counters: %s", exc)
+            with _counts_lock:
+                _counts[key] += amount
+
+
+def lookup(text, source, target, model):
+    """Return the remembered translation, or None."""
+    if not _cacheable(text):
+        return None
+    key = memory_key(text, source, target, model)
+    translated = _lru_get(key)
+    if translated is not None:
+        _incr(LRU_HITS_KEY, HITS_KEY)
+        return translated
+    cutoff = timezone.now() - timedelta(days=settings.TRANSLATION_MEMORY_TTL_DAYS)
+    try:
+        entry = (
+            TranslationMemoryEntry.objects.filter(key=key, created_at__gte=cutoff)
+            .only("translated_text", "created_at")
+            .first()
+        )
+        if entry is not None:
+            TranslationMemoryEntry.objects.filter(id=entry.id).update(
+                hit_count=F("hit_count") + 1,
+                last_used_at=timezone.now(),
+            )
+    except DatabaseError as exc:
+        # The memory is an optimization: a busy database must not fail the translation.
+        logger.warning("Translation memory lookup failed: %s", exc)
+        entry = None
+    if entry is None:
+        _incr(MISSES_KEY)
+        return None
+    _lru_put(key, entry.translated_text, entry.created_at.timestamp())
+    _incr(HITS_KEY)
+    return entry.translated_text
+
+
+def store(text, source, target, model, translated):
+    if not _cacheable(text) or not translated:
+        return
+    key = memory_key(text, source, target, model)
+    _lru_put(key, translated)
+    try:
+        _store_entry(key, text, source, target, model, translated)
+    except DatabaseError as exc:
+        logger.warning("Translation memory store failed: %s", exc)
+
+
+def _store_entry(key, text, source, target, model, translated):
+    TranslationMemoryEntry.objects.update_or_create(
+        key=key,
+        defaults={
+            "source_language": source or "",
+            "target_language": target or "",
+            "model": model or "",
+            "source_text": text,
+            "translated_text": translated,
+            "size_bytes": len(text.encode("utf-8")) + len(translated.encode("utf-8")),
+            "created_at": timezone.now(),
+            "last_used_at": timezone.now(),
+        },
+    )
+    # Evict at most every five minutes; a DELETE per store locks SQLite under parallel chunks.
+    if cache.add(EVICT_KEY, 1, timeout=300):
+        evict()
+
+
+def evict():
+    cutoff = timezone.now() - timedelta(days=settings.TRANSLATION_MEMORY_TTL_DAYS)
+    TranslationMemoryEntry.objects.filter(created_at__lt=cutoff).delete()
+    stale_ids = list(
+        TranslationMemoryEntry.objects.order_by("-last_used_at").values_list("id", flat=True)[
+            settings.TRANSLATION_MEMORY_MAX_ENTRIES:
+        ]
+    )
+    if stale_ids:
+        TranslationMemoryEntry.objects.filter(id__in=stale_ids).delete()
+
+
+def stats():
+    flush_counters()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    totals = TranslationMemoryEntry.objects.aggregate(size_bytes=Sum("size_bytes"), stored_hits=Sum("hit_count"))
+    with _lru_lock:
+        lru_entries = len(_lru)
+    return {
+        "enabled": settings.TRANSLATION_MEMORY_ENABLED,
+        "entries": TranslationMemoryEntry.objects.count(),
+        "size_bytes": totals["size_bytes"] or 0,
+        "stored_hits": totals["stored_hits"] or 0,
+        "lru_entries": lru_entries,
+        "lru_hits": cache.get(LRU_HITS_KEY, 0),
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+    }
+
+
+def purge():
+    deleted, _ = TranslationMemoryEntry.objects.all().delete()
+    with _lru_lock:
+        _lru.clear()
+    with _counts_lock:
+        for key in _counts:
+            _counts[key] = 0
+    cache.delete_many([HITS_KEY, LRU_HITS_KEY, MISSES_KEY])
+    return deleted
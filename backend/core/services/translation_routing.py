@@ -0,0 +1,114 @@
+"""Model routing for translation requests.
+
+Short, simple inputs (field labels, single lines) go to the fast model with
+a short timeout; long or multi-line inputs go to the quality model with a
+longer one. The thresholds and models come from SiteSettings. Every provider
+call is recorded as a TranslationCall (route, model, latency, tokens) so
+the rules can be tuned against p95 latency and cost.
+"""
+import logging
+import re
+import time
+from collections import namedtuple
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.utils import timezone
+from core.models import SiteSettings, TranslationCall
+
+logger = logging.getLogger(__name__)
+
+CJK_RE = re.compile(r"[　-〿぀-ヿ㐀-䶿一-鿿豈-﫿＀-￯]")
+PRUNE_KEY = "translation_calls:pruned"
+
+Route = namedtuple("Route", "name model timeout reason")
+
+
+def estimate_tokens(text):
+    """Rough token count: about one per CJK character, one per four other characters."""
+    cjk = len(CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def get_rules():
+    site_settings = SiteSettings.objects.first() or SiteSettings()
+    return {
+        "enabled": site_settings.translation_routing_enabled,
+        "fast_model": site_settings.translation_fast_model or settings.OPENAI_MODEL,
+        "quality_model": site_settings.translation_quality_model or settings.OPENAI_MODEL,
+        "fast_max_tokens": site_settings.translation_fast_max_tokens,
+        "fast_max_lines": site_settings.translation_fast_max_lines,
+        "fast_timeout": site_settings.translation_fast_timeout or settings.OPENAI_TIMEOUT,
+        "quality_timeout": site_settings.translation_quality_timeout or settings.OPENAI_TIMEOUT,
+    }
+
+
+def choose_route(text, model=None):
+    """The Route (model and read timeout) for translating text."""
+    rules = get_rules()
+    if model:
+        return Route("explicit", model, rules["quality_timeout"], "requested")
+    if not rules["enabled"]:
+        return Route("default", settings.OPENAI_MODEL, settings.OPENAI_TIMEOUT, "routing disabled")
+    if estimate_tokens(text) > rules["fast_max_tokens"]:
+        return Route("quality", rules["quality_model"], rules["quality_timeout"], "length")
+    if text.strip().count("\n") + 1 > rules["fast_max_lines"]:
+        return Route("quality", rules["quality_model"], rules["quality_timeout"], "lines")
+    return Route("fast", rules["fast_model"], rules["fast_timeout"], "short")
+
+
+def record_call(route, started, input_chars, ok=True, usage=None, ttfb=None, streamed=False):
+    """Store one provider call; `started` is its time.monotonic() start."""
+    usage = usage or {}
+    try:
+        TranslationCall.objects.create(
+            route=route.name,
+            reason=route.reason,
+            model=route.model,
+            input_chars=input_chars,
+            input_tokens=usage.get("input_tokens"),
+            output_tokens=usage.get("output_tokens"),
+            latency_ms=int((time.monotonic() - started) * 1000),
+            ttfb_ms=int(ttfb * 1000) if ttfb is not None else None,
+            streamed=streamed,
+            ok=ok,
+        )
+        # Prune old records at most once an hour.
+        if cache.add(PRUNE_KEY, 1, timeout=3600):
+            cutoff = timezone.now() - timedelta(days=settings.TRANSLATION_CALL_LOG_DAYS)
+            TranslationCall.objects.filter(created_at__lt=cutoff).delete()
+    except DatabaseError as exc:
+        logger.warning("Could not record translation call: %s", exc)
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+
+
+def stats(days=7):
+    """Latency and token totals per route and model over the last `days` days."""
+    since = timezone.now() - timedelta(days=days)
+    groups = {}
+    rows = TranslationCall.objects.filter(created_at__gte=since).values_list(
+        "route", "model", "latency_ms", "input_tokens", "output_tokens", "ok"
+    )
+    for route, model, latency_ms, input_tokens, output_tokens, ok in rows.iterator():
+        group = groups.setdefault((route, model), {"latencies": [], "errors": 0, "input_tokens": 0, "output_tokens": 0})
+        group["latencies"].append(latency_ms)
+        group["errors"] += 0 if ok else 1
+        group["input_tokens"] += input_tokens or 0
+        group["output_tokens"] += output_tokens or 0
+    calls = []
+    for (route, model), group in sorted(groups.items()):
+        latencies = sorted(group.pop("latencies"))
+        calls.append({
+            "route": route,
+            "model": model,
+            "calls": len(latencies),
+            "latency_ms_avg": round(sum(latencies) / len(latencies)),
+            "latency_ms_p50": _percentile(latencies, 0.5),
+            "latency_ms_p95": _percentile(latencies, 0.95),
+            **group,
+        })
+    return {"days": days, "rules": get_rules(), "calls": calls}
@@ -0,0 +1,8 @@
+from core.models import UsageLog
+
+
+def increment_usage(user, action, metadata=None):
+    profile = user.profile
+    profile.usage_count += 1
+    profile.save(update_fields=["usage_count"])
+    UsageLog.objects.create(user=user, action=action, metadata=metadata or {})
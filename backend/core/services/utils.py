@@ -4,6 +4,7 @@ import requests
 from core.models import SiteSettings
 import dns.resolver
 from django.conf import settings
+from . import http_client, vision_breaker
 
 
 def validate_email_domain(email):
@@ -22,35 +23,84 @@ def extract_base64(data_url):
     return match.group(1) if match else data_url
 
 
-def _get_google_vision_key():
+def get_google_vision_key():
     site_settings = SiteSettings.objects.first()
     if site_settings and site_settings.google_vision_api_key:
         return site_settings.google_vision_api_key
     return settings.GOOGLE_VISION_API_KEY
 
 
-def request_google_vision_text(base64_image, language_hint=None):
-    api_key = _get_google_vision_key()
+class VisionImageError(Exception):
+    """Vision returned an error for one image of a batch."""
+
+
+def _vision_image_request(base64_image, language_hint=None):
+    entry = {
+        "image": {"content": base64_image},
+        "features": [{"type": "TEXT_DETECTION"}],
+    }
+    if language_hint:
+        entry["imageContext"] = {"languageHints": [language_hint]}
+    return entry
+
+
+def _counts_against_vision(exc):
+    # Network errors, timeouts, 5xx, throttling and auth failures mean Vision is
+    # unusable right now; other 4xx are about this particular request.
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        code = exc.response.status_code
+        return code >= 500 or code in (401, 403, 429)
+    return isinstance(exc, (requests.RequestException, ValueError))
+
+
+def _post_vision_requests(image_requests, api_key):
+    vision_breaker.check()
+    try:
+        response = http_client.post(
+            "vision",
+            f"https://vision.googleapis.com/v1/images:annotate?key={api_key}",
+            json={"requests": image_requests},
+        )
+        response.raise_for_status()
+        responses = response.json().get("responses", [])
+    except Exception as exc:
+        if _counts_against_vision(exc):
+            vision_breaker.record_failure(exc)
+        else:
+            vision_breaker.record_success()
+        raise
+    vision_breaker.record_success()
+    return responses
+
+
+def request_google_vision_text(base64_image, language_hint=None, api_key=None):
+    api_key = api_key or get_google_vision_key()
     if not api_key:
         raise ValueError("GOOGLE_VISION_API_KEY is missing")
 
-    payload = {
-        "requests": [
-            {
-                "image": {"content": base64_image},
-                "features": [{"type": "TEXT_DETECTION"}],
-            }
-        ]
-    }
+    responses = _post_vision_requests([_vision_image_request(base64_image, language_hint)], api_key)
+    return (responses or [{}])[0].get("fullTextAnnotation", {}).get("text", "")
 
-    if language_hint:
-        payload["requests"][0]["imageContext"] = {"languageHints": [language_hint]}
 
-    response = requests.post(
-        f"https://vision.googleapis.com/v1/images:annotate?key={api_key}",
-        json=payload,
-        timeout=60,
+def request_google_vision_batch(base64_images, language_hint=None, api_key=None):
+    """Annotate several images in a single images:annotate call.
+
+    Returns one entry per input image, in order: the detected text, or a
+    VisionImageError if Vision reported an error for that image.
+    """
+    api_key = api_key or get_google_vision_key()
+    if not api_key:
+        raise ValueError("GOOGLE_VISION_API_KEY is missing")
+
+    responses = _post_vision_requests(
+        [_vision_image_request(base64_image, language_hint) for base64_image in base64_images],
+        api_key,
     )
-    response.raise_for_status()
-    data = response.json()
-    return data.get("responses", [{}])[0].get("fullTextAnnotation", {}).get("text", "")
+    results = []
+    for index in range(len(base64_images)):
+        item = responses[index] if index < len(responses) else {"error": {"message": "No response for image"}}
+        if item.get("error"):
+            results.append(VisionImageError(item["error"].get("message", "Vision image error")))
+        else:
+            results.append(item.get("fullTextAnnotation", {}).get("text", ""))
+    return results
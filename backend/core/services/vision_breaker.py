@@ -0,0 +1,119 @@
+"""Circuit breaker for the Google Vision client.
+
+State lives in the Django cache so every web and OCR worker process sees the
+same circuit: once Vision is failing, pages go straight to the local engine
+instead of each waiting for its own timeout.
+
+closed    -> calls go through; the last OCR_VISION_BREAKER_WINDOW outcomes are kept.
+open      -> calls are refused until OCR_VISION_BREAKER_COOLDOWN seconds pass.
+half_open -> one caller gets a probe; success closes the circuit, failure re-opens it.
+"""
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+STATE_KEY = "vision_breaker:state"
+WINDOW_KEY = "vision_breaker:window"
+PROBE_KEY = "vision_breaker:probe"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class VisionCircuitOpen(Exception):
+    """Vision is skipped because the circuit breaker is open."""
+
+
+def _state():
+    return cache.get(STATE_KEY) or {"state": CLOSED, "opened_at": None, "last_error": ""}
+
+
+def _set_state(state, last_error=""):
+    value = {
+        "state": state,
+        "opened_at": time.time() if state != CLOSED else None,
+        "last_error": last_error,
+    }
+    cache.set(STATE_KEY, value, None)
+    return value
+
+
+def _window():
+    return cache.get(WINDOW_KEY) or []
+
+
+def allow_request():
+    """Return True if a Vision call may be made now."""
+    if not settings.OCR_VISION_BREAKER_ENABLED:
+        return True
+    state = _state()
+    if state["state"] == CLOSED:
+        return True
+    if time.time() - (state["opened_at"] or 0) < settings.OCR_VISION_BREAKER_COOLDOWN:
+        return False
+    # Cooldown is over: exactly one caller across all processes gets the probe.
+    # The probe key expires, so a crashed prober does not hold the circuit forever.
+    if cache.add(PROBE_KEY, True, settings.OCR_VISION_BREAKER_COOLDOWN):
+        if state["state"] != HALF_OPEN:
+            _set_state(HALF_OPEN, state["last_error"])
+        return True
+    return False
+
+
+def check():
+    if not allow_request():
+        raise VisionCircuitOpen("Google Vision circuit is open")
+
+
+def record_success():
+    if not settings.OCR_VISION_BREAKER_ENABLED:
+        return
+    if _state()["state"] != CLOSED:
+        _set_state(CLOSED)
+        cache.delete_many([WINDOW_KEY, PROBE_KEY])
+        return
+    # Read-modify-write on the window is not atomic; a lost update only shifts
+    # the failure rate slightly, which a breaker tolerates.
+    cache.set(WINDOW_KEY, (_window() + [True])[-settings.OCR_VISION_BREAKER_WINDOW:], None)
+
+
+def record_failure(error=""):
+    if not settings.OCR_VISION_BREAKER_ENABLED:
+        return
+    error = str(error)[:300]
+    state = _state()
+    if state["state"] != CLOSED:
+        _set_state(OPEN, error)
+        cache.delete(PROBE_KEY)
+        return
+    window = (_window() + [False])[-settings.OCR_VISION_BREAKER_WINDOW:]
+    cache.set(WINDOW_KEY, window, None)
+    failures = window.count(False)
+    if (
+        len(window) >= settings.OCR_VISION_BREAKER_MIN_CALLS
+        and failures / len(window) >= settings.OCR_VISION_BREAKER_FAILURE_RATE
+    ):
+        _set_state(OPEN, error)
+        cache.delete(WINDOW_KEY)
+
+
+def reset():
+    cache.delete_many([STATE_KEY, WINDOW_KEY, PROBE_KEY])
+
+
+def status():
+    state = _state()
+    window = _window()
+    retry_in = 0
+    if state["state"] != CLOSED and state["opened_at"]:
+        retry_in = max(0, int(settings.OCR_VISION_BREAKER_COOLDOWN - (time.time() - state["opened_at"])))
+    return {
+        "enabled": settings.OCR_VISION_BREAKER_ENABLED,
+        "state": state["state"],
+        "last_error": state["last_error"],
+        "recent_calls": len(window),
+        "recent_failures": window.count(False),
+        "failure_rate": round(window.count(False) / len(window), 3) if window else 0.0,
+        "retry_in_seconds": retry_in,
+    }
@@ -1,8 +1,9 @@
 import uuid
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import UserProfile, PremiumKey
+from .models import GlossaryTerm, UserProfile, PremiumKey
+from .services import glossary
 
 
 @receiver(post_save, sender=User)
@@ -11,4 +12,9 @@ def create_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance)
         # Yeni kullanıcıya otomatik kısıtlı key ver (1 kullanım hakkı)
         key_code = f"TRIAL-{uuid.uuid4().hex[:12].upper()}"
-        PremiumKey.objects.create(code=key_code, max_uses=1, is_active=True)
\ No newline at end of file
+        PremiumKey.objects.create(code=key_code, max_uses=1, is_active=True)
+
+@receiver(post_save, sender=GlossaryTerm)
+@receiver(post_delete, sender=GlossaryTerm)
+def refresh_glossary(sender, **kwargs):
+    glossary.invalidate()
@@ -0,0 +1,379 @@
+import tempfile
+import threading
+import weakref
+from pathlib import Path
+from unittest import mock
+import requests
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from core.models import Document, GlossaryTerm
+from core.services import field_classifier, glossary, ocr_jobs, ocr_service, openai_service, translation_memory
+from core.services.utils import VisionImageError
+
+
+def make_pdf(path, page_count):
+    import fitz
+
+    document = fitz.open()
+    for number in range(1, page_count + 1):
+        page = document.new_page()
+        page.insert_text((72, 72), f"Page {number}: scanned contract text", fontsize=14)
+        page.draw_rect(fitz.Rect(72, 100 + number % 20 * 10, 300, 140 + number % 20 * 10), color=(0, 0, 0), width=2)
+    document.save(path)
+    document.close()
+
+
+class LiveRenders:
+    """Peak number of rendered page images alive at once.
+
+    Pixel buffers are allocated by Pillow in C, where tracemalloc cannot see
+    them, so rendered images are counted through weakrefs instead.
+    """
+
+    def __init__(self):
+        self.live = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self._frombytes = Image.frombytes
+
+    def _render(self, *args, **kwargs):
+        image = self._frombytes(*args, **kwargs)
+        with self._lock:
+            self.live += 1
+            self.peak = max(self.peak, self.live)
+        weakref.finalize(image, self._freed)
+        return image
+
+    def _freed(self):
+        with self._lock:
+            self.live -= 1
+
+    def measure(self, func):
+        with mock.patch.object(ocr_service.Image, "frombytes", self._render):
+            func()
+        return self.peak
+
+
+@override_settings(
+    OCR_CACHE_ENABLED=False, OCR_SKIP_BLANK_PAGES=False, OCR_DEDUPE_PAGES=False, OCR_VISION_BATCH_SIZE=2
+)
+class PageStreamingMemoryTests(TestCase):
+    """The number of rendered pages held at once must not grow with the page count."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.short_pdf = Path(self.tmp.name) / "short.pdf"
+        self.long_pdf = Path(self.tmp.name) / "long.pdf"
+        make_pdf(self.short_pdf, 10)
+        make_pdf(self.long_pdf, 60)
+
+    def test_iter_pdf_pages_holds_one_page(self):
+        def consume(path):
+            for page in ocr_service.iter_pdf_pages(str(path)):
+                page.pixels()
+                page.release()
+
+        short_peak = LiveRenders().measure(lambda: consume(self.short_pdf))
+        long_peak = LiveRenders().measure(lambda: consume(self.long_pdf))
+        # The generator's own reference to the last render lives until the next page.
+        self.assertLessEqual(long_peak, 2)
+        self.assertEqual(short_peak, long_peak)
+
+    def test_run_ocr_pages_holds_only_in_flight_batches(self):
+        def fake_local_ocr(images, language_hint=None):
+            return [("recognized text", 95.0) for _ in images]
+
+        with self.assertLogs("core.services.ocr_service", level="WARNING"), \
+                mock.patch.object(ocr_service, "get_google_vision_key", return_value=None), \
+                mock.patch.object(ocr_service, "_local_first", return_value=False), \
+                mock.patch.object(ocr_service, "run_free_ocr_many", fake_local_ocr):
+            # A plain function, not a Mock: a Mock would keep every image it was called with.
+            results = {}
+
+            def run(path, name):
+                results[name] = ocr_service.run_ocr_pages(str(path), "pdf", mode="ocr", concurrency=2)
+
+            short_peak = LiveRenders().measure(lambda: run(self.short_pdf, "short"))
+            long_peak = LiveRenders().measure(lambda: run(self.long_pdf, "long"))
+
+        self.assertEqual(len(results["short"]), 10)
+        self.assertEqual(len(results["long"]), 60)
+        # Two batches in flight, one being filled and one cache-lookup group: 4 x 2 pages.
+        self.assertLessEqual(long_peak, 8, (short_peak, long_peak))
+
+
+class InlineOCRJobTests(TestCase):
+    """Without a worker, a failing job must end failed rather than queued or running."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=self.tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_corrupt_pdf_fails_the_job(self):
+        document = Document.objects.create(file=SimpleUploadedFile("broken.pdf", b"not a pdf"), file_type="pdf")
+        job = ocr_jobs.enqueue_ocr_job(document, None, {})
+        with self.assertLogs("core.services.ocr_jobs", level="ERROR"):
+            job = ocr_jobs.run_job_now(job)
+        self.assertEqual(job.status, "failed")
+        self.assertTrue(job.error)
+        self.assertEqual(job.attempts, 1)
+
+    @override_settings(OCR_CACHE_ENABLED=False, OCR_SKIP_BLANK_PAGES=False, OCR_DEDUPE_PAGES=False)
+    def test_new_job_does_not_resume_previous_job_pages(self):
+        path = Path(self.tmp.name) / "contract.pdf"
+        make_pdf(path, 3)
+        document = Document.objects.create(file=SimpleUploadedFile("contract.pdf", path.read_bytes()), file_type="pdf")
+
+        def run(label):
+            def fake_local_ocr(images, language_hint=None):
+                return [(label, 95.0) for _ in images]
+
+            with self.assertLogs("core.services.ocr_service", level="WARNING"), \
+                    mock.patch.object(ocr_service, "get_google_vision_key", return_value=None), \
+                    mock.patch.object(ocr_service, "_local_first", return_value=False), \
+                    mock.patch.object(ocr_service, "run_free_ocr_many", side_effect=fake_local_ocr):
+                return ocr_jobs.run_job_now(ocr_jobs.enqueue_ocr_job(document, None, {"mode": "ocr"}))
+
+        first = run("first pass")
+        second = run("second pass")
+        self.assertNotEqual(first.id, second.id)
+        self.assertEqual(second.status, "done")
+        self.assertEqual(second.progress["resumed"], 0)
+        document.refresh_from_db()
+        self.assertNotIn("first pass", document.extracted_text)
+        self.assertEqual(document.extracted_text.count("second pass"), 3)
+
+    @override_settings(OCR_CACHE_ENABLED=False, OCR_VISION_BATCH_SIZE=1)
+    def test_concurrent_jobs_keep_their_own_pages(self):
+        path = Path(self.tmp.name) / "contract.pdf"
+        make_pdf(path, 3)
+        document = Document.objects.create(file=SimpleUploadedFile("contract.pdf", path.read_bytes()), file_type="pdf")
+        first = ocr_jobs.enqueue_ocr_job(document, None, {"mode": "ocr", "language_hint": "tr", "concurrency": 1})
+        save_page = ocr_jobs.save_page
+        interleaved = []
+
+        def fake_local_ocr(images, language_hint=None):
+            return [(f"text read with {language_hint}", 95.0) for _ in images]
+
+        def save_then_interleave(job, page):
+            save_page(job, page)
+            # After the first job's first page, a second job runs the whole document.
+            if job.id == first.id and not interleaved:
+                second = ocr_jobs.enqueue_ocr_job(document, None, {"mode": "ocr", "language_hint": "ja"})
+                interleaved.append(ocr_jobs.run_job_now(second))
+
+        with self.assertLogs("core.services.ocr_service", level="WARNING"), \
+                mock.patch.object(ocr_service, "get_google_vision_key", return_value=None), \
+                mock.patch.object(ocr_service, "_local_first", return_value=False), \
+                mock.patch.object(ocr_service, "run_free_ocr_many", fake_local_ocr), \
+                mock.patch.object(ocr_jobs, "save_page", save_then_interleave):
+            first = ocr_jobs.run_job_now(first)
+
+        self.assertEqual(interleaved[0].status, "done")
+        self.assertEqual(first.status, "done")
+        document.refresh_from_db()
+        self.assertEqual(document.extracted_text, "\n\n".join(["text read with tr"] * 3))
+
+
+class PageRangeTests(TestCase):
+    def test_accepts_strings_numbers_and_lists(self):
+        self.assertEqual(ocr_service.parse_page_ranges("1-2,5"), {1, 2, 5})
+        self.assertEqual(ocr_service.parse_page_ranges(3), {3})
+        self.assertEqual(ocr_service.parse_page_ranges([1, "3-4"]), {1, 3, 4})
+
+    def test_other_types_are_rejected_as_invalid_input(self):
+        for value in (True, 2.5, {"start": 1}):
+            with self.assertRaises(ValueError):
+                ocr_service.parse_page_ranges(value)
+
+
+class FieldDateTests(TestCase):
+    def test_slash_dates_are_only_reformatted_in_date_fields(self):
+        self.assertEqual(field_classifier.local_translation("01/02/2024", "date", "ja"), "2024年2月1日")
+        self.assertEqual(field_classifier.local_translation("01/02/2024", "text", "ja"), "01/02/2024")
+        self.assertEqual(field_classifier.local_translation("01.02.2024", "text", "ja"), "2024年2月1日")
+
+
+@override_settings(GLOSSARY_ENABLED=True, GLOSSARY_REFRESH_SECONDS=0)
+class GlossaryVersionTests(TestCase):
+    """Glossary edits made by another process (no signal here) are picked up from the database."""
+
+    def test_added_and_deleted_terms_are_seen_without_invalidate(self):
+        def add(source_term, target_term):
+            GlossaryTerm.objects.bulk_create([
+                GlossaryTerm(source_language="ja", target_language="tr", source_term=source_term, target_term=target_term)
+            ])
+
+        self.assertIsNone(glossary.exact_match("足場", "ja", "tr"))
+        add("足場", "iskele")
+        self.assertEqual(glossary.exact_match("足場", "ja", "tr"), "iskele")
+        with mock.patch.object(glossary, "invalidate"):
+            add("養生", "koruma örtüsü")
+            GlossaryTerm.objects.filter(source_term="足場").delete()
+        self.assertIsNone(glossary.exact_match("足場", "ja", "tr"))
+        self.assertEqual(glossary.exact_match("養生", "ja", "tr"), "koruma örtüsü")
+
+
+class VisionBatchRetryTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        path = Path(self.tmp.name) / "scan.pdf"
+        make_pdf(path, 4)
+        self.pages = list(ocr_service.iter_pdf_pages(str(path), text_layer_min_chars=10 ** 6))
+        self.calls = []
+
+    def _run(self, vision):
+        def request(payloads, language_hint=None, api_key=None):
+            self.calls.append(len(payloads))
+            return vision(payloads)
+
+        def local_ocr(images, language_hint=None):
+            return [("local", 90.0) for _ in images]
+
+        with self.assertLogs("core.services.ocr_service", level="INFO"), \
+                mock.patch.object(ocr_service, "request_google_vision_batch", side_effect=request), \
+                mock.patch.object(ocr_service, "run_free_ocr_many", side_effect=local_ocr):
+            return ocr_service._ocr_batch(self.pages, api_key="key")
+
+    def test_timed_out_batch_is_not_sent_again(self):
+        def vision(payloads):
+            raise requests.ReadTimeout("read timed out")
+
+        results = self._run(vision)
+        self.assertEqual(self.calls, [4])
+        self.assertEqual({page["engine"] for page in results}, {"tesseract"})
+
+    def test_only_pages_vision_rejected_are_retried(self):
+        def vision(payloads):
+            if len(payloads) == 1:
+                return ["second try"]
+            return [VisionImageError("internal error")] + ["text"] * (len(payloads) - 1)
+
+        results = self._run(vision)
+        self.assertEqual(self.calls, [4, 1])
+        self.assertEqual([page["text"] for page in results], ["second try", "text", "text", "text"])
+
+
+class LocalFirstEscalationTests(TestCase):
+    def test_escalated_pages_respect_the_vision_batch_budget(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = Path(tmp.name) / "scan.pdf"
+        make_pdf(path, 6)
+        pages = list(ocr_service.iter_pdf_pages(str(path)))
+        budget = 2 * max(len(page.payload) for page in pages)
+        requests_made = []
+
+        def request(payloads, language_hint=None, api_key=None):
+            requests_made.append(sum(len(payload) for payload in payloads))
+            return ["vision text"] * len(payloads)
+
+        def unsure_local_ocr(images, language_hint=None):
+            return [("?", 10.0) for _ in images]
+
+        with override_settings(OCR_VISION_BATCH_BYTES=budget), \
+                mock.patch.object(ocr_service, "request_google_vision_batch", request), \
+                mock.patch.object(ocr_service, "run_free_ocr_many", unsure_local_ocr):
+            results = ocr_service._local_first_batch(pages, api_key="key")
+
+        self.assertEqual([page["engine"] for page in results], ["google_vision"] * 6)
+        self.assertEqual(len(requests_made), 3)
+        self.assertTrue(all(size <= budget for size in requests_made), (budget, requests_made))
+
+
+@override_settings(OCR_CACHE_ENABLED=False, OCR_SKIP_BLANK_PAGES=True, OCR_DEDUPE_PAGES=True)
+class PageScreeningTests(TestCase):
+    def setUp(self):
+        import fitz
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "invoices.pdf"
+        document = fitz.open()
+        for total in (1234, 1284, 1234, 7234):
+            page = document.new_page()
+            page.insert_text((72, 72), "INVOICE", fontsize=14)
+            page.insert_text((72, 120), f"Total amount: {total}", fontsize=10)
+        document.new_page().insert_text((72, 700), "Onaylayan: ........ Tarih: 12.03.2024 İmza:", fontsize=10)
+        document.new_page()
+        document.save(self.path)
+        document.close()
+
+    def test_only_identical_pages_are_duplicates_and_keep_their_text(self):
+        def fake_local_ocr(images, language_hint=None):
+            return [(f"read {ocr_service.ink_tiles(image)}", 95.0) for image in images]
+
+        stored = {}
+        with self.assertLogs("core.services.ocr_service", level="WARNING"), \
+                mock.patch.object(ocr_service, "get_google_vision_key", return_value=None), \
+                mock.patch.object(ocr_service, "_local_first", return_value=False), \
+                mock.patch.object(ocr_service, "run_free_ocr_many", fake_local_ocr):
+            results = ocr_service.run_ocr_pages(
+                str(self.path), "pdf", mode="ocr", on_page=lambda page: stored.update({page["page"]: page["text"]})
+            )
+
+        self.assertEqual(results[2]["engine"], "duplicate")
+        self.assertEqual(ocr_service.skipped_pages(results), {"blank": [6], "duplicates": {"3": 1}})
+        self.assertEqual(results[2]["text"], results[0]["text"])
+        self.assertEqual(stored[3], stored[1])
+        self.assertTrue(all(page["text"] for page in results[:5]))
+
+
+@override_settings(TRANSLATION_MEMORY_ENABLED=True)
+class TranslationMemoryCounterTests(TestCase):
+    def setUp(self):
+        translation_memory.purge()
+        translation_memory.store("merhaba dünya", "tr", "ja", "model", "こんにちは世界")
+
+    def test_lru_hits_do_not_touch_the_database(self):
+        translation_memory.flush_counters()
+        with self.assertNumQueries(0):
+            for _ in range(50):
+                self.assertEqual(translation_memory.lookup("merhaba dünya", "tr", "ja", "model"), "こんにちは世界")
+        stats = translation_memory.stats()
+        self.assertEqual((stats["hits"], stats["lru_hits"]), (50, 50))
+
+    def test_counter_failures_do_not_fail_lookups(self):
+        with self.assertLogs("core.services.translation_memory", level="WARNING"), \
+                mock.patch.object(translation_memory, "COUNTER_FLUSH_SECONDS", 0), \
+                mock.patch.object(translation_memory.cache, "add", side_effect=ConnectionError("cache down")):
+            self.assertEqual(translation_memory.lookup("merhaba dünya", "tr", "ja", "model"), "こんにちは世界")
+
+
+@override_settings(GLOSSARY_ENABLED=False, TRANSLATION_MEMORY_ENABLED=False)
+class FieldBatchRoutingTests(TestCase):
+    RULES = {
+        "enabled": True,
+        "fast_model": "fast-model",
+        "quality_model": "quality-model",
+        "fast_max_tokens": 150,
+        "fast_max_lines": 2,
+        "fast_timeout": 20,
+        "quality_timeout": 120,
+    }
+
+    def _route_for(self, values):
+        routes = []
+
+        def batch(pending, source, target, route, api_key, constraints=""):
+            routes.append(route)
+            return dict(pending)
+
+        with mock.patch.object(openai_service, "_get_api_key", return_value="key"), \
+                mock.patch.object(openai_service.translation_routing, "get_rules", return_value=self.RULES), \
+                mock.patch.object(openai_service, "_request_batch_translation", batch):
+            openai_service.translate_fields(values, "tr", "ja")
+        return routes[0].name
+
+    def test_many_short_fields_use_the_quality_route(self):
+        values = {f"field_{index}": "İskele kurulumu ve koruma örtüsü serilmesi" for index in range(25)}
+        self.assertEqual(self._route_for(values), "quality")
+
+    def test_a_few_short_fields_use_the_fast_route(self):
+        self.assertEqual(self._route_for({"name": "Ad", "surname": "Soyad"}), "fast")
@@ -12,8 +12,11 @@ urlpatterns = [
     path("auth/redeem-key/", views.redeem_key),
     path("documents/upload/", views.upload_document),
     path("documents/<int:doc_id>/ocr/", views.run_ocr),
+    path("documents/ocr-jobs/<int:job_id>/", views.ocr_job_status),
     path("documents/<int:doc_id>/translate/", views.translate_document),
+    path("documents/<int:doc_id>/translate/stream/", views.translate_document_stream),
     path("documents/full-translate/", views.full_translate),
+    path("documents/full-translate/stream/", views.full_translate_stream),
     path("documents/blank/", views.blank_document),
     path("templates/", views.list_templates),
     path("templates/create/", views.create_template),
@@ -27,6 +30,14 @@ urlpatterns = [
     path("admin/premium-keys/", views.admin_premium_keys),
     path("admin/api-keys/", views.admin_api_keys),
     path("admin/ocr-status/", views.admin_ocr_status),
+    path("admin/ocr-cache/purge/", views.admin_ocr_cache_purge),
+    path("admin/translation-memory/", views.admin_translation_memory),
+    path("admin/translation-memory/purge/", views.admin_translation_memory_purge),
+    path("admin/translation-stream/", views.admin_translation_stream),
+    path("admin/translation-routing/", views.admin_translation_routing),
+    path("admin/glossary/", views.admin_glossary),
+    path("admin/glossary/<int:term_id>/update/", views.admin_update_glossary_term),
+    path("admin/glossary/<int:term_id>/delete/", views.admin_delete_glossary_term),
     path("admin/support-requests/", views.admin_support_requests),
     path("admin/support-requests/<int:request_id>/update/", views.admin_support_request_update),
     path("admin/templates/<int:template_id>/fields/", views.admin_add_template_field),
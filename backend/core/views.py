@@ -1,6 +1,8 @@
 import uuid
 import io
 import json
+import logging
+import time
 from pathlib import Path
 from django.conf import settings
 from django.contrib.auth import authenticate
@@ -10,9 +12,11 @@ from django.core.mail import send_mail
 from django.core.signing import Signer, BadSignature
 from django.core.files import File
 from django.core.files.base import ContentFile
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.text import slugify
+from django.db import IntegrityError
 from django.db.models import Count, Q, Sum
 from datetime import timedelta
 from rest_framework import status
@@ -21,7 +25,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import Document, DocumentTemplate, PremiumKey, PremiumKeyRequest, TemplateFill, UsageLog, UserActivityLog, AIChatLog, SiteSettings, TemplateField, UserProfile, SupportRequest
+from .models import Document, DocumentTemplate, PremiumKey, PremiumKeyRequest, TemplateFill, UsageLog, UserActivityLog, AIChatLog, SiteSettings, TemplateField, UserProfile, SupportRequest, OCRJob, GlossaryTerm
 from .permissions import IsVerifiedEmail, IsAdminUser
 from .serializers import (
     RegisterSerializer,
@@ -39,16 +43,22 @@ from .serializers import (
     ProfileUpdateSerializer,
     ApiKeysSerializer,
     SupportRequestSerializer,
+    OCRJobSerializer,
+    GlossaryTermSerializer,
 )
 from .services.file_processing import get_file_type
-from .services.ocr_service import run_google_vision_ocr
-from .services.openai_service import translate_text
+from .services.ocr_jobs import enqueue_ocr_job, run_job_now
+from .services.ocr_service import local_engine_available
+from .services import document_translation, glossary, ocr_cache, tesseract_pool, translation_memory, translation_routing, vision_breaker
+from .services.usage import increment_usage
+from .services.field_classifier import split_for_translation
+from .services.openai_service import translate_fields
 from .services.chat_service import chat_with_ai, get_chat_provider_settings
 from .services.template_render import render_pdf, render_xlsx, render_blank, render_free_text
 from .services.utils import validate_email_domain
-from openpyxl import load_workbook
 from PIL import Image
-import xlrd
+
+logger = logging.getLogger(__name__)
 
 signer = Signer()
 
@@ -75,13 +85,6 @@ def check_usage_limit(user):
     return profile.usage_count < settings.FREE_USAGE_LIMIT
 
 
-def increment_usage(user, action, metadata=None):
-    profile = user.profile
-    profile.usage_count += 1
-    profile.save(update_fields=["usage_count"])
-    UsageLog.objects.create(user=user, action=action, metadata=metadata or {})
-
-
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def register(request):
@@ -270,35 +273,23 @@ def run_ocr(request, doc_id):
     doc = get_object_or_404(Document, id=doc_id, uploaded_by=request.user)
     if not check_usage_limit(request.user):
         return Response({"error": "Free usage limit reached."}, status=status.HTTP_403_FORBIDDEN)
-    file_path = doc.file.path
-    text = ""
-    if doc.file_type in ["pdf", "image"]:
-        text = run_google_vision_ocr(file_path, doc.file_type, request.data.get("language_hint"))
-    elif doc.file_type == "xlsx":
-        chunks = []
-        try:
-            workbook = load_workbook(file_path, data_only=True)
-            for sheet in workbook.worksheets:
-                for row in sheet.iter_rows(values_only=True):
-                    row_text = " ".join([str(cell) for cell in row if cell is not None])
-                    if row_text.strip():
-                        chunks.append(row_text)
-        except Exception:
-            legacy = xlrd.open_workbook(file_path)
-            for sheet in legacy.sheets():
-                for row_idx in range(sheet.nrows):
-                    row_values = sheet.row_values(row_idx)
-                    row_text = " ".join([str(cell) for cell in row_values if cell not in ["", None]])
-                    if row_text.strip():
-                        chunks.append(row_text)
-        text = "\n".join(chunks)
-    else:
+    if doc.file_type not in ["pdf", "image", "xlsx"]:
         return Response({"error": "Unsupported file type."}, status=status.HTTP_400_BAD_REQUEST)
-    doc.extracted_text = text
-    doc.status = "ocr_done"
-    doc.save(update_fields=["extracted_text", "status"])
-    increment_usage(request.user, "ocr", {"document": doc.id})
-    return Response(DocumentSerializer(doc).data)
+    try:
+        job = enqueue_ocr_job(doc, request.user, request.data)
+    except ValueError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    if not settings.OCR_ASYNC and job.status == "queued":
+        run_job_now(job)
+        return Response(OCRJobSerializer(job).data)
+    return Response(OCRJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsVerifiedEmail])
+def ocr_job_status(request, job_id):
+    job = get_object_or_404(OCRJob.objects.select_related("document"), id=job_id, user=request.user)
+    return Response(OCRJobSerializer(job).data)
 
 
 @api_view(["POST"])
@@ -308,14 +299,71 @@ def translate_document(request, doc_id):
     if not check_usage_limit(request.user):
         return Response({"error": "Free usage limit reached."}, status=status.HTTP_403_FORBIDDEN)
     text = doc.extracted_text or request.data.get("text", "")
-    translated = translate_text(text, doc.source_language, doc.target_language or "ja")
+    # Unchanged paragraphs keep their stored translation unless a full re-translation is asked for.
+    state = None if request.data.get("full") else doc.translation_segments
+    translated, segments, summary = document_translation.translate_incremental(
+        text, doc.source_language, doc.target_language or "ja", state
+    )
     doc.translated_text = translated
+    doc.translation_segments = segments
     doc.status = "translated"
-    doc.save(update_fields=["translated_text", "status"])
-    increment_usage(request.user, "translate", {"document": doc.id})
+    doc.save(update_fields=["translated_text", "translation_segments", "status"])
+    increment_usage(request.user, "translate", {"document": doc.id, **summary})
     return Response(DocumentSerializer(doc).data)
 
 
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _translation_event_stream(text, source, target, on_done):
+    """SSE events: `delta` per translated piece, then `done` (on_done's payload) or `error`."""
+    started = time.monotonic()
+    parts = []
+    try:
+        for delta in document_translation.stream_document(text, source, target):
+            if not delta:
+                continue
+            if not parts:
+                document_translation.record_ttfb((time.monotonic() - started) * 1000)
+            parts.append(delta)
+            yield _sse("delta", {"text": delta})
+        yield _sse("done", on_done("".join(parts).strip()))
+    except Exception as exc:
+        logger.exception("Streaming translation failed")
+        yield _sse("error", {"error": str(exc)})
+
+
+def _event_stream_response(events):
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Keep nginx from buffering the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsVerifiedEmail])
+def translate_document_stream(request, doc_id):
+    doc = get_object_or_404(Document, id=doc_id, uploaded_by=request.user)
+    if not check_usage_limit(request.user):
+        return Response({"error": "Free usage limit reached."}, status=status.HTTP_403_FORBIDDEN)
+    text = doc.extracted_text or request.data.get("text", "")
+    target = doc.target_language or "ja"
+
+    def on_done(translated):
+        doc.translated_text = translated
+        doc.translation_segments = document_translation.segment_state(text, translated, doc.source_language, target)
+        doc.status = "translated"
+        doc.save(update_fields=["translated_text", "translation_segments", "status"])
+        increment_usage(request.user, "translate", {"document": doc.id, "stream": True})
+        return DocumentSerializer(doc).data
+
+    return _event_stream_response(
+        _translation_event_stream(text, doc.source_language, target, on_done)
+    )
+
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def list_templates(request):
@@ -412,11 +460,17 @@ def fill_template(request, template_id):
     if not check_usage_limit(request.user):
         return Response({"error": "Free usage limit reached."}, status=status.HTTP_403_FORBIDDEN)
     input_data = request.data.get("input_data", {})
-    output_data = {}
-    for key, value in input_data.items():
-        output_data[key] = translate_text(str(value), "auto", template.output_language or "ja")
-
     fields = list(template.fields.all())
+    target = template.output_language or "ja"
+    output_data, pending = split_for_translation(
+        {key: str(value) for key, value in input_data.items()},
+        {field.key: field.field_type for field in fields},
+        target,
+    )
+    if pending:
+        output_data.update(translate_fields(pending, "auto", target))
+    output_data = {key: output_data[key] for key in input_data}
+
     if template.template_type == "pdf" and template.file:
         output_path = render_pdf(template.file.path, fields, output_data)
     elif template.template_type == "xlsx":
@@ -443,11 +497,26 @@ def full_translate(request):
         return Response({"error": "Free usage limit reached."}, status=status.HTTP_403_FORBIDDEN)
     text = request.data.get("text", "")
     source = request.data.get("source_language", "auto")
-    translated = translate_text(text, source, "ja")
+    translated = document_translation.translate_document(text, source, "ja")
     increment_usage(request.user, "full_translate")
     return Response({"translated_text": translated})
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsVerifiedEmail])
+def full_translate_stream(request):
+    if not check_usage_limit(request.user):
+        return Response({"error": "Free usage limit reached."}, status=status.HTTP_403_FORBIDDEN)
+    text = request.data.get("text", "")
+    source = request.data.get("source_language", "auto")
+
+    def on_done(translated):
+        increment_usage(request.user, "full_translate", {"stream": True})
+        return {"translated_text": translated}
+
+    return _event_stream_response(_translation_event_stream(text, source, "ja", on_done))
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated, IsVerifiedEmail])
 def blank_document(request):
@@ -456,7 +525,7 @@ def blank_document(request):
     text = request.data.get("text", "")
     source = request.data.get("source_language", "auto")
     title = request.data.get("title", "Translated Document")
-    translated = translate_text(text, source, "ja")
+    translated = document_translation.translate_document(text, source, "ja")
     output_path = render_free_text(translated, title=title)
     increment_usage(request.user, "blank_document")
     return Response({"output_file": f"{settings.MEDIA_URL}outputs/{output_path.name}"})
@@ -501,12 +570,117 @@ def admin_ocr_status(request):
         tesseract_available = False
     settings_obj, _ = SiteSettings.objects.get_or_create(id=1)
     google_key = settings_obj.google_vision_api_key or settings.GOOGLE_VISION_API_KEY
+    local_engine = "tesseract_pool" if settings.OCR_LOCAL_ENGINE == "tesseract_pool" else "tesseract"
+    breaker = vision_breaker.status()
+    vision_usable = bool(google_key) and breaker["state"] != "open"
+    local_first = settings.OCR_STRATEGY == "local_first" and local_engine_available()
     return Response({
         "tesseract_available": tesseract_available,
         "google_vision_configured": bool(google_key),
+        "primary_engine": "google_vision" if vision_usable and not local_first else local_engine,
+        "local_engine": local_engine,
+        "strategy": {
+            "mode": "local_first" if local_first else "vision_first",
+            "min_confidence": settings.OCR_LOCAL_MIN_CONFIDENCE,
+            "min_words": settings.OCR_LOCAL_MIN_WORDS,
+        },
+        "tesseract_pool": tesseract_pool.status(),
+        "vision_breaker": breaker,
+        "cache": ocr_cache.stats(),
     })
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_ocr_cache_purge(request):
+    deleted = ocr_cache.purge()
+    return Response({"message": "OCR cache purged.", "deleted": deleted})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_translation_memory(request):
+    return Response(translation_memory.stats())
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_translation_stream(request):
+    return Response(document_translation.stream_stats())
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_translation_routing(request):
+    try:
+        days = max(1, int(request.query_params.get("days", 7)))
+    except ValueError:
+        return Response({"error": "days must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(translation_routing.stats(days))
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_translation_memory_purge(request):
+    deleted = translation_memory.purge()
+    return Response({"message": "Translation memory purged.", "deleted": deleted})
+
+
+@api_view(["GET", "POST"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_glossary(request):
+    if request.method == "GET":
+        terms = GlossaryTerm.objects.all()
+        source = request.query_params.get("source_language")
+        target = request.query_params.get("target_language")
+        query = request.query_params.get("q")
+        if source:
+            terms = terms.filter(source_language=source)
+        if target:
+            terms = terms.filter(target_language=target)
+        if query:
+            terms = terms.filter(Q(source_term__icontains=query) | Q(target_term__icontains=query))
+        return Response({
+            "glossary": glossary.status(),
+            "terms": GlossaryTermSerializer(terms[:1000], many=True).data,
+        })
+    # A single term or a list (bulk import); existing terms of the same pair are updated.
+    many = isinstance(request.data, list)
+    serializer = GlossaryTermSerializer(data=request.data, many=many)
+    serializer.is_valid(raise_exception=True)
+    items = serializer.validated_data if many else [serializer.validated_data]
+    GlossaryTerm.objects.bulk_create(
+        [GlossaryTerm(**item) for item in items],
+        update_conflicts=True,
+        unique_fields=["source_language", "target_language", "source_term"],
+        update_fields=["target_term", "note", "is_active", "updated_at"],
+    )
+    # bulk_create sends no post_save signals.
+    glossary.invalidate()
+    return Response({"message": "Glossary updated.", "saved": len(items)}, status=status.HTTP_201_CREATED)
+
+
+@api_view(["PUT"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_update_glossary_term(request, term_id):
+    term = get_object_or_404(GlossaryTerm, id=term_id)
+    serializer = GlossaryTermSerializer(term, data=request.data, partial=True)
+    serializer.is_valid(raise_exception=True)
+    try:
+        serializer.save()
+    except IntegrityError:
+        return Response({"error": "This term already exists for the language pair."}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(serializer.data)
+
+
+@api_view(["DELETE"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_delete_glossary_term(request, term_id):
+    term = get_object_or_404(GlossaryTerm, id=term_id)
+    term.delete()
+    return Response({"message": "Term deleted."})
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdminUser])
 def admin_support_requests(request):
@@ -17,7 +17,7 @@ import {
 import AutoAwesomeIcon from '@mui/icons-material/AutoAwesome'
 import CloudUploadIcon from '@mui/icons-material/CloudUpload'
 import { useSnackbar } from 'notistack'
-import { uploadDocument, runOcr, translateDocument } from '../../services/documentService'
+import { uploadDocument, runOcr, translateDocument, translateDocumentStream } from '../../services/documentService'
 import { ocrLanguageOptions } from '../../utils/constants'
 import { downloadText } from '../../utils/storage'
 
@@ -76,7 +76,14 @@ const DocumentTranslatePanel = () => {
     if (!documentId) return
     setIsLoading(true)
     try {
-      const doc = await translateDocument(documentId)
+      // The first translation streams in as it is generated; later ones only
+      // re-translate changed paragraphs, which the blocking endpoint does.
+      let doc
+      if (translatedText) {
+        doc = await translateDocument(documentId)
+      } else {
+        doc = await translateDocumentStream(documentId, (delta) => setTranslatedText((text) => text + delta))
+      }
       setTranslatedText(doc.translated_text || '')
       enqueueSnackbar('Çeviri tamamlandı', { variant: 'success' })
     } catch (error) {
@@ -8,13 +8,35 @@ export const uploadDocument = async (file, sourceLanguage = 'auto') => {
   return data
 }
 
-export const runOcr = async (docId, languageHint) => {
-  const { data } = await api.post(`/documents/${docId}/ocr/`, { language_hint: languageHint })
+const OCR_POLL_INTERVAL_MS = 1500
+const OCR_POLL_TIMEOUT_MS = 30 * 60 * 1000
+
+export const getOcrJob = async (jobId) => {
+  const { data } = await api.get(`/documents/ocr-jobs/${jobId}/`)
   return data
 }
 
-export const translateDocument = async (docId) => {
-  const { data } = await api.post(`/documents/${docId}/translate/`)
+// options.pages: "1-3,7"; options.regions: [{ page, x, y, width, height }] in 0-1 page units
+export const runOcr = async (docId, languageHint, onProgress, options = {}) => {
+  let { data: job } = await api.post(`/documents/${docId}/ocr/`, { language_hint: languageHint, ...options })
+  const deadline = Date.now() + OCR_POLL_TIMEOUT_MS
+  while (job.status === 'queued' || job.status === 'running') {
+    if (Date.now() > deadline) {
+      throw new Error('OCR is taking too long; check the job again later')
+    }
+    onProgress?.(job.progress)
+    await new Promise((resolve) => setTimeout(resolve, OCR_POLL_INTERVAL_MS))
+    job = await getOcrJob(job.id)
+  }
+  if (job.status === 'failed') {
+    throw new Error(job.error || 'OCR failed')
+  }
+  return job.document
+}
+
+// Only edited paragraphs are re-translated; options.full: true re-translates everything
+export const translateDocument = async (docId, options = {}) => {
+  const { data } = await api.post(`/documents/${docId}/translate/`, options)
   return data
 }
 
@@ -25,3 +47,46 @@ export const fullTranslate = async (text, sourceLanguage = 'auto') => {
   })
   return data
 }
+
+// POSTs to a server-sent-events endpoint; calls onDelta(text) as the translation
+// arrives and resolves with the final `done` payload.
+const streamTranslation = async (path, body, onDelta) => {
+  const token = localStorage.getItem('eroxai-access-token')
+  const response = await fetch(`${api.defaults.baseURL}${path}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'application/json, text/event-stream',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    body: JSON.stringify(body),
+  })
+  if (!response.ok) {
+    const data = await response.json().catch(() => ({}))
+    throw new Error(data.error || 'Translation failed')
+  }
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+  let buffer = ''
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += value
+    let boundary
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const message = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      const event = message.match(/^event: (.*)$/m)?.[1]
+      const data = JSON.parse(message.match(/^data: (.*)$/m)?.[1] || '{}')
+      if (event === 'delta') onDelta?.(data.text)
+      if (event === 'error') throw new Error(data.error || 'Translation failed')
+      if (event === 'done') return data
+    }
+  }
+  throw new Error('Translation stream ended early')
+}
+
+export const translateDocumentStream = (docId, onDelta) =>
+  streamTranslation(`/documents/${docId}/translate/stream/`, {}, onDelta)
+
+export const fullTranslateStream = (text, sourceLanguage = 'auto', onDelta) =>
+  streamTranslation('/documents/full-translate/stream/', { text, source_language: sourceLanguage }, onDelta)